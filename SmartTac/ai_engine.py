@@ -1,7 +1,11 @@
+import json
 import math
+import os
 import random
+import time
 from constants import *
-from ai_learning import AILearning
+from ai_learning import AILearning, board_key, opponent_of
+from threat_search import find_forced_win, find_forced_defense, win_squares, four_moves
 
 # Initialize AI learning system
 ai_learning = AILearning()
@@ -65,63 +69,111 @@ def analyze_player_strategy(board):
         'moves': player_moves
     }
 
-def evaluate(board):
-    score = 0
+# --- Evaluation weights ---
+# Every constant of evaluate() lives in this parameter vector so it can be
+# tuned (see tuner.py).  Values are magnitudes; the sign of each term is
+# fixed by the feature, and the pos_/dir_ entries multiply line scores.
+DEFAULT_EVAL_WEIGHTS = {
+    'ai_four': 1000,               # Winning line
+    'ai_open_three': 100,          # Open-ended three in a row
+    'ai_half_three': 50,           # Three in a row with one open end
+    'ai_open_two': 20,             # Open-ended two in a row
+    'ai_half_two': 10,             # Two in a row with one open end
+    'player_four': 1000,           # Block player's win
+    'player_open_three': 200,
+    'player_half_three': 100,
+    'player_open_two': 40,
+    'player_half_two': 20,
+    'pos_center_line': 3,          # Line through the center rows/columns
+    'pos_near_center': 2,          # Line starting in the inner 4x4
+    'dir_diagonal': 1.2,           # Diagonal near the center
+    'dir_center_row': 1.5,         # Horizontal in the center rows
+    'dir_center_col': 1.5,         # Vertical in the center columns
+    'center_pair_threat': 200,     # Player pair on a center line that can still grow
+    'blocked_center_line': 2,      # Both ends blocked, center line
+    'blocked_other': 1,            # Both ends blocked elsewhere
+    'ai_center': 8,
+    'ai_center_connected': 10,
+    'ai_semi_corner': 4,           # Corner positions near center
+    'ai_semi_edge': 3,             # Edge positions near center
+    'ai_edge': 1,
+    'player_center': 12,
+    'player_center_connected': 15,
+}
+WEIGHT_NAMES = list(DEFAULT_EVAL_WEIGHTS)
+EVAL_WEIGHTS_FILE = "eval_weights.json"
+
+# Line features are (kind, position class, direction class); the classes
+# name their multiplier weight, or None for a multiplier of 1
+LINE_KINDS = [
+    'ai_open_three', 'ai_half_three', 'ai_open_two', 'ai_half_two',
+    'player_open_three', 'player_half_three', 'player_open_two', 'player_half_two',
+]
+POSITION_CLASSES = ['pos_center_line', 'pos_near_center', None]
+DIRECTION_CLASSES = ['dir_diagonal', 'dir_center_row', 'dir_center_col', None]
+LINEAR_FEATURES = [name for name in WEIGHT_NAMES
+                   if name not in LINE_KINDS and not name.startswith(('pos_', 'dir_'))]
+
+def feature_sign(name):
+    return 1 if name.startswith('ai_') else -1
+
+eval_weights = dict(DEFAULT_EVAL_WEIGHTS)
+
+def weights_vector(weights=None):
+    """Weights as a list in WEIGHT_NAMES order"""
+    weights = weights or eval_weights
+    return [weights[name] for name in WEIGHT_NAMES]
+
+def set_eval_weights(weights):
+    """Install new weights (dict or vector); cached search results are dropped"""
+    if not isinstance(weights, dict):
+        weights = dict(zip(WEIGHT_NAMES, weights))
+    eval_weights.clear()
+    eval_weights.update(DEFAULT_EVAL_WEIGHTS)
+    eval_weights.update({name: value for name, value in weights.items() if name in DEFAULT_EVAL_WEIGHTS})
+    if 'search_context' in globals():
+        search_context.clear()
+        for ctx in _profile_contexts.values():
+            ctx.clear()
+
+def load_eval_weights(path=EVAL_WEIGHTS_FILE):
+    """Load tuned weights if the file exists; returns True when loaded"""
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, 'r') as f:
+            set_eval_weights(json.load(f))
+        return True
+    except (ValueError, OSError) as e:
+        print(f"Error loading evaluation weights: {e}")
+        return False
+
+def save_eval_weights(weights, path=EVAL_WEIGHTS_FILE):
+    if not isinstance(weights, dict):
+        weights = dict(zip(WEIGHT_NAMES, weights))
+    with open(path, 'w') as f:
+        json.dump({name: float(weights[name]) for name in WEIGHT_NAMES}, f, indent=2)
+
+# Tuned weights, when present, replace the defaults at startup
+load_eval_weights()
+
+# --- Evaluation features ---
+def evaluation_features(board):
+    """Count the evaluation features of a position.
+
+    Returns a dict mapping either a linear feature name or a line feature
+    (kind, position class, direction class) to its count.
+    """
+    features = {}
     # Check all directions with balanced weights
     directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
     
-    # Analyze player's strategy
-    player_strategy = analyze_player_strategy(board)
-    
     # Function to check if a position is near center
     def is_near_center(row, col):
         return (1 <= row <= 4) and (1 <= col <= 4)
     
-    # Function to calculate threat level for any direction
-    def calculate_threat(row, col, dr, dc):
-        threat_score = 0
-        count = 0
-        space_before = False
-        space_after = False
-        mark = board[row][col]
-        is_center_line = False
-        
-        # Check if this is a center line
-        if (dr == 0 and 2 <= col <= 3) or (dc == 0 and 2 <= row <= 3):
-            is_center_line = True
-        
-        # Check forward diagonal
-        r, c = row, col
-        while 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE:
-            if board[r][c] == PLAYER:
-                count += 1
-            elif board[r][c] is None:
-                space_after = True
-                break
-            else:
-                break
-            r, c = r + dr, c + dc
-        
-        # Check backward diagonal
-        r, c = row - dr, col - dc
-        while 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE:
-            if board[r][c] == PLAYER:
-                count += 1
-            elif board[r][c] is None:
-                space_before = True
-                break
-            else:
-                break
-            r, c = r - dr, c - dc
-        
-        # Calculate threat score
-        if count >= 2:
-            if space_before and space_after:
-                threat_score = 25 if is_near_center(row, col) else 15
-            elif space_before or space_after:
-                threat_score = 15 if is_near_center(row, col) else 10
-        
-        return threat_score
+    def add(key, count=1):
+        features[key] = features.get(key, 0) + count
     
     for row in range(BOARD_SIZE):
         for col in range(BOARD_SIZE):
@@ -168,52 +220,44 @@ def evaluate(board):
                     is_diagonal = abs(dr) == abs(dc) == 1
                     is_horizontal = dr == 0
                     is_vertical = dc == 0
+                    # The original evaluate() tested the is_center_line function
+                    # itself, which is always truthy, so every line counts as one
+                    center_line = True
                     
-                    # Calculate position-based multiplier
-                    pos_multiplier = 1
-                    if is_center_line:
-                        pos_multiplier = 3
+                    # Position-based multiplier
+                    if center_line:
+                        pos_class = 'pos_center_line'
                     elif is_near_center(row, col):
-                        pos_multiplier = 2
+                        pos_class = 'pos_near_center'
+                    else:
+                        pos_class = None
                     
                     # Direction-based multiplier
-                    dir_multiplier = 1
                     if is_diagonal and is_near_center(row, col):
-                        dir_multiplier = 1.2
+                        dir_class = 'dir_diagonal'
                     elif is_horizontal and 2 <= row <= 3:
-                        dir_multiplier = 1.5
+                        dir_class = 'dir_center_row'
                     elif is_vertical and 2 <= col <= 3:
-                        dir_multiplier = 1.5
+                        dir_class = 'dir_center_col'
+                    else:
+                        dir_class = None
                     
-                    if mark == AI:
-                        if count >= 4:
-                            score += 1000  # Winning move
-                        elif count == 3:
-                            if empty_ends == 2:  # Open-ended three in a row
-                                score += 100 * pos_multiplier * dir_multiplier
-                            elif empty_ends == 1:  # Three in a row with one open end
-                                score += 50 * pos_multiplier * dir_multiplier
-                        elif count == 2:
-                            if empty_ends == 2:  # Open-ended two in a row
-                                score += 20 * pos_multiplier * dir_multiplier
-                            elif empty_ends == 1:  # Two in a row with one open end
-                                score += 10 * pos_multiplier * dir_multiplier
-                    elif mark == PLAYER:
-                        if count >= 4:
-                            score -= 1000  # Block player's win
-                        elif count == 3:
-                            if empty_ends == 2:  # Block open-ended three
-                                score -= 200 * pos_multiplier * dir_multiplier
-                            elif empty_ends == 1:  # Block three with one open end
-                                score -= 100 * pos_multiplier * dir_multiplier
-                        elif count == 2:
-                            if empty_ends == 2:  # Block open-ended two
-                                score -= 40 * pos_multiplier * dir_multiplier
-                            elif empty_ends == 1:  # Block two with one open end
-                                score -= 20 * pos_multiplier * dir_multiplier
+                    side = 'ai' if mark == AI else 'player'
+                    if count >= 4:
+                        add(side + '_four')
+                    elif count == 3:
+                        if empty_ends == 2:
+                            add((side + '_open_three', pos_class, dir_class))
+                        elif empty_ends == 1:
+                            add((side + '_half_three', pos_class, dir_class))
+                    elif count == 2:
+                        if empty_ends == 2:
+                            add((side + '_open_two', pos_class, dir_class))
+                        elif empty_ends == 1:
+                            add((side + '_half_two', pos_class, dir_class))
                     
                     # Immediate threat detection for center sequences
-                    if mark == PLAYER and is_center_line:
+                    if mark == PLAYER and center_line:
                         if count == 2 and empty_ends >= 1:
                             # Check if the sequence can be extended to win
                             potential_win = False
@@ -226,19 +270,14 @@ def evaluate(board):
                                 board[r][c] is None):
                                 potential_win = True
                             if potential_win:
-                                score -= 200 * center_bonus  # Severe penalty for potential center win
+                                add('center_pair_threat', center_bonus)
                     
-                    # Add penalty for blocked positions, less severe in center
+                    # Penalty for blocked positions, less severe in center
                     if blocked_ends == 2:  # Both ends blocked
-                        score -= 2 if is_center_line else 1
+                        add('blocked_center_line' if center_line else 'blocked_other')
     
-    # Add position-based scoring with enhanced center control
-    center_positions = {
-        (2, 2): 8,  # Top-left center
-        (2, 3): 8,  # Top-right center
-        (3, 2): 8,  # Bottom-left center
-        (3, 3): 8   # Bottom-right center
-    }
+    # Position-based features with enhanced center control
+    center_positions = {(2, 2), (2, 3), (3, 2), (3, 3)}
     
     semi_center_rows = [1, 4]  # Rows adjacent to center
     semi_center_cols = [1, 4]  # Columns adjacent to center
@@ -246,44 +285,71 @@ def evaluate(board):
     for row in range(BOARD_SIZE):
         for col in range(BOARD_SIZE):
             if board[row][col] == AI:
-                # Score center positions highly
                 if (row, col) in center_positions:
-                    score += center_positions[(row, col)]
+                    add('ai_center')
                     
                     # Check for connected center pieces
                     for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
                         r, c = row + dr, col + dc
                         if (r, c) in center_positions and board[r][c] == AI:
-                            score += 10  # Bonus for connected center pieces
+                            add('ai_center_connected')
                             
-                # Score positions adjacent to center
+                # Positions adjacent to center
                 elif row in semi_center_rows and col in semi_center_cols:
-                    score += 4  # Corner positions near center
+                    add('ai_semi_corner')
                 elif row in semi_center_rows or col in semi_center_cols:
-                    score += 3  # Edge positions near center
+                    add('ai_semi_edge')
                 else:
-                    score += 1  # Edge positions
+                    add('ai_edge')
             
             elif board[row][col] == PLAYER:
-                # Penalty for opponent controlling center
+                # Opponent controlling center
                 if (row, col) in center_positions:
-                    score -= 12  # Higher penalty for opponent center control
+                    add('player_center')
                     
-                    # Extra penalty for connected center pieces
+                    # Connected center pieces
                     for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
                         r, c = row + dr, col + dc
                         if (r, c) in center_positions and board[r][c] == PLAYER:
-                            score -= 15  # Severe penalty for opponent's connected center pieces
+                            add('player_center_connected')
     
+    return features
+
+def score_features(features, weights=None):
+    """Combine feature counts with a weight dict (the engine's by default)"""
+    weights = weights or eval_weights
+    score = 0
+    for key, count in features.items():
+        if isinstance(key, tuple):
+            kind, pos_class, dir_class = key
+            value = weights[kind]
+            if pos_class:
+                value *= weights[pos_class]
+            if dir_class:
+                value *= weights[dir_class]
+            score += feature_sign(kind) * value * count
+        else:
+            score += feature_sign(key) * weights[key] * count
     return score
 
+def evaluate(board):
+    return score_features(evaluation_features(board))
+
 # --- Minimax Algorithm ---
-def minimax(board, depth, is_maximizing, alpha, beta):
+# Wins score outside anything evaluate() can return, less the plies needed
+# to reach them, so a faster win always beats a slower one
+WIN_SCORE = 100000
+MATE_THRESHOLD = WIN_SCORE - BOARD_SIZE * BOARD_SIZE - 1
+
+def is_mate_score(score):
+    return abs(score) >= MATE_THRESHOLD
+
+def minimax(board, depth, is_maximizing, alpha, beta, ply=0):
     winner = check_winner(board)
     if winner == AI:
-        return 10
+        return WIN_SCORE - ply
     elif winner == PLAYER:
-        return -10
+        return -(WIN_SCORE - ply)
     elif not available_moves(board) or depth == 0:
         return evaluate(board)
 
@@ -291,7 +357,7 @@ def minimax(board, depth, is_maximizing, alpha, beta):
         max_eval = -math.inf
         for (i, j) in available_moves(board):
             board[i][j] = AI
-            eval = minimax(board, depth - 1, False, alpha, beta)
+            eval = minimax(board, depth - 1, False, alpha, beta, ply + 1)
             board[i][j] = None
             max_eval = max(max_eval, eval)
             alpha = max(alpha, eval)
@@ -302,7 +368,7 @@ def minimax(board, depth, is_maximizing, alpha, beta):
         min_eval = math.inf
         for (i, j) in available_moves(board):
             board[i][j] = PLAYER
-            eval = minimax(board, depth - 1, True, alpha, beta)
+            eval = minimax(board, depth - 1, True, alpha, beta, ply + 1)
             board[i][j] = None
             min_eval = min(min_eval, eval)
             beta = min(beta, eval)
@@ -310,6 +376,244 @@ def minimax(board, depth, is_maximizing, alpha, beta):
                 break
         return min_eval
 
+# --- Negamax with Principal Variation Search ---
+# Transposition table bound types
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Width of the scout window; evaluate() returns fractional scores, so a
+# window of 1 would not be a true null window
+SCOUT_WIDTH = 1e-3
+
+ASPIRATION_WINDOW = 50
+SEARCH_DEPTH = 4  # Plies from the root, i.e. the root move plus minimax depth 3
+TT_MAX_ENTRIES = 200000
+
+REPLY_CACHE_MAX_ENTRIES = 4096
+
+class SearchAborted(Exception):
+    """Raised inside a search when its context has been asked to stop"""
+
+class SearchBudgetExceeded(SearchAborted):
+    """Raised when a search runs out of its node or time budget"""
+
+class SearchContext:
+    """State shared between searches: transposition table and node counter.
+
+    Passing `shared` reuses another context's table and reply cache, so a
+    background search (pondering) fills the same tables the main search
+    reads.  Setting `stop_event` aborts the search with SearchAborted.
+
+    `max_nodes` and `time_limit` (seconds) bound the search; search_root
+    then returns the deepest finished iteration.  `candidate_width` keeps
+    only that many of the best-ordered moves at every node.
+
+    Forward pruning is off by default.  `lmr_start` enables late move
+    reductions: from that move index on, quiet moves at depth `lmr_min_depth`
+    or more are searched `lmr_reduction` plies shallower, and again at full
+    depth if they beat alpha.  `futility_margin` skips quiet moves one ply
+    above the leaves when the static score plus the margin cannot reach
+    alpha.  Wins, blocks and moves that make a four are never pruned.
+
+    Futility pruning currently costs time: it needs a full evaluate() at
+    every node one ply above the leaves, which eats what the skipped leaves
+    save (about 0.85x nodes but 1.0-1.1x time at depth 4 in search_bench).
+    """
+
+    def __init__(self, max_tt_entries=TT_MAX_ENTRIES, shared=None, stop_event=None,
+                 max_nodes=None, time_limit=None, candidate_width=None,
+                 lmr_start=None, lmr_min_depth=3, lmr_reduction=1, futility_margin=None):
+        self.tt = shared.tt if shared else {}
+        # Finished root searches by board key: (move, score, depth)
+        self.replies = shared.replies if shared else {}
+        self.max_tt_entries = max_tt_entries
+        self.stop_event = stop_event
+        self.max_nodes = max_nodes
+        self.deadline = time.perf_counter() + time_limit if time_limit else None
+        self.candidate_width = candidate_width
+        self.lmr_start = lmr_start
+        self.lmr_min_depth = lmr_min_depth
+        self.lmr_reduction = lmr_reduction
+        self.futility_margin = futility_margin
+        self.nodes = 0
+        # Pruning statistics, for measuring against the unpruned search
+        self.reductions = 0
+        self.re_searches = 0
+        self.futility_prunes = 0
+
+    @property
+    def prunes(self):
+        """Whether this context's results can differ from a full-width search"""
+        return bool(self.candidate_width or self.lmr_start is not None
+                    or self.futility_margin is not None)
+
+    def check_budget(self):
+        if self.stop_event is not None and self.stop_event.is_set():
+            raise SearchAborted()
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchBudgetExceeded()
+        # Reading the clock on every node would cost more than the check saves
+        if self.deadline is not None and self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            raise SearchBudgetExceeded()
+
+    def store(self, key, depth, score, flag, move):
+        if len(self.tt) >= self.max_tt_entries and key not in self.tt:
+            self.tt.clear()
+        self.tt[key] = (depth, score, flag, move)
+
+    def store_reply(self, key, move, score, depth):
+        if len(self.replies) >= REPLY_CACHE_MAX_ENTRIES and key not in self.replies:
+            self.replies.clear()
+        self.replies[key] = (move, score, depth)
+
+    def clear(self):
+        self.tt.clear()
+        self.replies.clear()
+        self.nodes = 0
+
+# Shared context so the table carries over from one move to the next
+search_context = SearchContext()
+
+def score_to_tt(score, ply):
+    """Store mate scores relative to the node so they survive a new root"""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+def score_from_tt(score, ply):
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
+
+def order_moves(board, moves, mark, tt_move=None):
+    """Order moves: table move, wins, blocks, then closeness to the center"""
+    wins = win_squares(board, mark)
+    blocks = win_squares(board, opponent_of(mark))
+
+    def priority(move):
+        if move == tt_move:
+            return -10000
+        score = abs(move[0] - 2.5) + abs(move[1] - 2.5)
+        if move in wins:
+            score -= 1000
+        elif move in blocks:
+            score -= 500
+        return score
+
+    return sorted(moves, key=priority)
+
+def negamax(board, depth, alpha, beta, mark, ply=0, ctx=search_context):
+    """Fail-soft negamax with PVS, scored from the side to move.
+
+    For the same depth and ply it returns the same value as minimax()
+    (negated when `mark` is the player); table entries are only reused at
+    equal depth so the two stay directly comparable.
+    """
+    ctx.nodes += 1
+    ctx.check_budget()
+    winner = check_winner(board)
+    if winner:
+        return WIN_SCORE - ply if winner == mark else -(WIN_SCORE - ply)
+    moves = available_moves(board)
+    if not moves or depth == 0:
+        score = evaluate(board)
+        return score if mark == AI else -score
+
+    # Mate distance pruning: nothing here can beat a win found nearer the root
+    alpha = max(alpha, -(WIN_SCORE - ply))
+    beta = min(beta, WIN_SCORE - ply - 1)
+    if alpha >= beta:
+        return alpha
+
+    key = board_key(board)
+    tt_move = None
+    entry = ctx.tt.get(key)
+    if entry:
+        tt_depth, tt_score, tt_flag, tt_move = entry
+        tt_score = score_from_tt(tt_score, ply)
+        if tt_depth == depth:
+            if tt_flag == EXACT:
+                return tt_score
+            if tt_flag == LOWER and tt_score >= beta:
+                return tt_score
+            if tt_flag == UPPER and tt_score <= alpha:
+                return tt_score
+
+    alpha_orig = alpha
+    other = opponent_of(mark)
+    best_score = -math.inf
+    best = None
+    ordered = order_moves(board, moves, mark, tt_move)
+    if ctx.candidate_width:
+        ordered = ordered[:ctx.candidate_width]
+
+    tactical = ()
+    futile = False
+    reducing = ctx.lmr_start is not None and depth >= ctx.lmr_min_depth \
+        and len(ordered) > ctx.lmr_start
+    if ctx.futility_margin is not None and depth == 1 and len(ordered) > 1:
+        static = evaluate(board)
+        futility_value = (static if mark == AI else -static) + ctx.futility_margin
+        futile = futility_value <= alpha
+    # Finding the tactical moves costs three scans of every line, so only
+    # nodes that may actually prune or reduce pay for it
+    if futile or reducing:
+        blocks = win_squares(board, other)
+        tactical = set(win_squares(board, mark)) | set(blocks) | set(four_moves(board, mark))
+        # Facing a four, every move but the block loses: nothing is quiet
+        if blocks:
+            tactical = set(ordered)
+
+    for index, (i, j) in enumerate(ordered):
+        quiet = index > 0 and (i, j) not in tactical and (i, j) != tt_move
+        if futile and quiet:
+            ctx.futility_prunes += 1
+            best_score = max(best_score, futility_value)
+            continue
+        # Never reduce past the leaves: negamax only stops at depth 0
+        reduction = 0
+        if reducing and quiet and index >= ctx.lmr_start:
+            reduction = min(ctx.lmr_reduction, depth - 1)
+            if reduction > 0:
+                ctx.reductions += 1
+
+        board[i][j] = mark
+        try:
+            if index == 0:
+                score = -negamax(board, depth - 1, -beta, -alpha, other, ply + 1, ctx)
+            else:
+                # Scout with a null window; re-search only if the move beats alpha
+                score = -negamax(board, depth - 1 - reduction, -alpha - SCOUT_WIDTH, -alpha,
+                                 other, ply + 1, ctx)
+                if reduction and score > alpha:
+                    # The reduced search was too optimistic to trust
+                    ctx.re_searches += 1
+                    score = -negamax(board, depth - 1, -alpha - SCOUT_WIDTH, -alpha, other, ply + 1, ctx)
+                if alpha < score < beta:
+                    score = -negamax(board, depth - 1, -beta, -score, other, ply + 1, ctx)
+        finally:
+            # Also undo the move when the search is aborted
+            board[i][j] = None
+
+        if score > best_score:
+            best_score = score
+            best = (i, j)
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+
+    if best_score <= alpha_orig:
+        flag = UPPER
+    elif best_score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    ctx.store(key, depth, score_to_tt(best_score, ply), flag, best)
+    return best_score
+
 # --- Best Move ---
 def check_center_threat(board):
     """Check for immediate threats in center rows/columns and diagonals"""
@@ -470,21 +774,159 @@ def is_center_line(row, col, dr, dc):
     """Check if a line goes through the center region"""
     return (dr == 0 and 2 <= col <= 3) or (dc == 0 and 2 <= row <= 3)
 
-def best_move(board):
-    best_val = -math.inf
-    moves = []
+def root_bonus(board, move):
+    """Bonus for diagonal moves near center; expects the AI mark already on `move`"""
+    i, j = move
+    bonus = 0
+    if 1 <= i <= 4 and 1 <= j <= 4:
+        for dr, dc in [(1, 1), (1, -1)]:
+            # Check both directions from this position
+            threat_score = calculate_diagonal_threat(board, i, j, dr, dc)
+            if threat_score > 0:
+                bonus += threat_score
+    return bonus
+
+def minimax_root(board, depth):
+    """Reference root search: score every move with plain minimax"""
+    scores = {}
+    for (i, j) in available_moves(board):
+        board[i][j] = AI
+        score = minimax(board, depth - 1, False, -math.inf, math.inf, 1)
+        if not is_mate_score(score):
+            score += root_bonus(board, (i, j))
+        scores[(i, j)] = score
+        board[i][j] = None
+    return scores
+
+def _search_root_window(board, depth, alpha, beta, root_moves, bonuses, ctx):
+    """PVS over the root moves with the diagonal bonus folded into the window"""
+    best_score = -math.inf
+    best = None
+    for index, (i, j) in enumerate(root_moves):
+        bonus = bonuses[(i, j)]
+        low, high = alpha - bonus, beta - bonus
+        board[i][j] = AI
+        try:
+            if index == 0:
+                score = -negamax(board, depth - 1, -high, -low, PLAYER, 1, ctx)
+            else:
+                score = -negamax(board, depth - 1, -low - SCOUT_WIDTH, -low, PLAYER, 1, ctx)
+                if low < score < high:
+                    score = -negamax(board, depth - 1, -high, -score, PLAYER, 1, ctx)
+        finally:
+            board[i][j] = None
+        # The bonus only separates heuristic scores, never proven results
+        if not is_mate_score(score):
+            score += bonus
+
+        if score > best_score:
+            best_score = score
+            best = (i, j)
+        alpha = max(alpha, score)
+        if alpha >= beta or score >= WIN_SCORE - 1:
+            # Nothing beats winning on this move
+            break
+    return best, best_score
+
+def search_root(board, max_depth, ctx=search_context):
+    """Iterative deepening PVS with aspiration windows; returns (move, score)"""
+    moves = available_moves(board)
+    if not moves:
+        return None, None
+
+    bonuses = {}
+    for (i, j) in moves:
+        board[i][j] = AI
+        bonuses[(i, j)] = root_bonus(board, (i, j))
+        board[i][j] = None
+
+    # Shuffle first so equally ordered moves still vary from game to game
+    random.shuffle(moves)
+    root_moves = order_moves(board, moves, AI)
+    if ctx.candidate_width:
+        root_moves = root_moves[:ctx.candidate_width]
+    best, score = None, None
+    completed = 0
+    for depth in range(1, max_depth + 1):
+        if score is None:
+            alpha, beta = -math.inf, math.inf
+        else:
+            alpha, beta = score - ASPIRATION_WINDOW, score + ASPIRATION_WINDOW
+        try:
+            move, value = _search_root_window(board, depth, alpha, beta, root_moves, bonuses, ctx)
+            if value <= alpha or value >= beta:
+                # Fell outside the aspiration window: repeat with a full window
+                move, value = _search_root_window(board, depth, -math.inf, math.inf,
+                                                  root_moves, bonuses, ctx)
+        except SearchBudgetExceeded:
+            # Out of budget: fall back to the deepest finished iteration
+            break
+        best, score = move, value
+        completed = depth
+        if score >= MATE_THRESHOLD:
+            # Earlier iterations found nothing faster, so this win is the quickest
+            break
+        # Search the previous best move first on the next iteration
+        root_moves.remove(best)
+        root_moves.insert(0, best)
+    if best is None:
+        # Not even one ply fit in the budget; trust the move ordering
+        return root_moves[0], None
+    if completed == max_depth or score >= MATE_THRESHOLD:
+        ctx.store_reply(board_key(board), best, score, max_depth)
+    return best, score
+
+# Tables per difficulty profile.  Every profile has its own reply cache, so
+# one level never answers with a move another level searched.  Profiles that
+# prune also get their own transposition table: their results must not leak
+# into the full-width table that the equality with minimax relies on
+_profile_contexts = {}
+
+def profile_context(profile, budget=True):
+    """Fresh search context with a profile's pruning, tables and (with `budget`) limits"""
+    ctx = SearchContext(max_nodes=profile.max_nodes if budget else None,
+                        time_limit=profile.time_limit if budget else None,
+                        candidate_width=profile.candidate_width, lmr_start=profile.lmr_start,
+                        futility_margin=profile.futility_margin)
+    tables = _profile_contexts.get(profile.name)
+    if tables is None:
+        tables = SearchContext()
+        if not ctx.prunes:
+            # Budgets only cut a search short, so its entries are exact
+            tables.tt = search_context.tt
+        _profile_contexts[profile.name] = tables
+    ctx.tt = tables.tt
+    ctx.replies = tables.replies
+    return ctx
+
+def best_move(board, profile=None):
+    """Pick the AI's move; `profile` is a difficulty.DifficultyProfile (None: full strength)"""
+    depth = profile.max_depth if profile else SEARCH_DEPTH
     
     # Define center and strategic positions
     center_positions = [(2, 2), (2, 3), (3, 2), (3, 3)]
     center_adjacent = [(1, 2), (1, 3), (2, 1), (2, 4), (3, 1), (3, 4), (4, 2), (4, 3)]
     
+    # Proven tactics come first: play a forced win, or stop the player's
+    if profile is None or profile.threat_search:
+        forced_win = find_forced_win(board, AI)
+        if forced_win:
+            ai_learning.record_move(board, forced_win[0])
+            return forced_win[0]
+        forced_defense = find_forced_defense(board, AI)
+        if forced_defense:
+            ai_learning.record_move(board, forced_defense)
+            return forced_defense
+    
     # First check for center threats
     center_threat = check_center_threat(board)
     if center_threat:
         return center_threat
     
     # First, try to use learned move
-    learned_move = ai_learning.get_learned_move(board)
+    learned_move = None
+    if profile is None or profile.use_learning:
+        learned_move = ai_learning.get_learned_move(board)
     if learned_move and board[learned_move[0]][learned_move[1]] is None:
         # Verify if learned move is good in current context
         board[learned_move[0]][learned_move[1]] = AI
@@ -528,26 +970,17 @@ def best_move(board):
                     return (i, j)
                 board[i][j] = None
     
-    # Check for diagonal opportunities and threats
-    diagonal_directions = [(1, 1), (1, -1)]
-    for (i, j) in available_moves(board):
-        board[i][j] = AI
-        move_val = minimax(board, 3, False, -math.inf, math.inf)
-        
-        # Add bonus for diagonal moves near center
-        if 1 <= i <= 4 and 1 <= j <= 4:
-            for dr, dc in diagonal_directions:
-                # Check both directions from this position
-                threat_score = calculate_diagonal_threat(i, j, dr, dc)
-                if threat_score > 0:
-                    move_val += threat_score
-        
-        board[i][j] = None
-        if move_val > best_val:
-            best_val = move_val
-            moves = [(i, j)]
-        elif move_val == best_val:
-            moves.append((i, j))
+    # Deliberate mistakes keep the lower levels beatable, and cost no search
+    if profile is not None and profile.noise and random.random() < profile.noise:
+        candidates = order_moves(board, available_moves(board), AI)
+        return random.choice(candidates[:profile.candidate_width or len(candidates)])
+    
+    # Full strength searches every remaining move in the shared context
+    ctx = search_context if profile is None else profile_context(profile)
+    # A reply this level searched while the player was thinking answers instantly
+    pondered = ctx.replies.get(board_key(board))
+    if pondered and pondered[2] >= depth:
+        return pondered[0]
     
-    # Return a random move from the best moves
-    return random.choice(moves) if moves else None
+    move, _ = search_root(board, depth, ctx)
+    return move
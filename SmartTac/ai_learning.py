@@ -1,11 +1,152 @@
 import json
+import math
 import os
-from typing import List, Dict, Tuple
+from collections import OrderedDict
+from typing import List, Dict, Tuple, Optional
 import random
+from constants import PLAYER, AI
+
+# --- Position keys ---
+# The one key format for positions: the engine's tables, the threat memo,
+# the learning store and the trainer all use it
+def board_key(board: List[List[Optional[str]]]) -> str:
+    """One character per cell, row by row, '_' for empty"""
+    return ''.join(cell or '_' for row in board for cell in row)
+
+def opponent_of(mark: str) -> str:
+    return PLAYER if mark == AI else AI
+
+def wilson_lower_bound(wins: int, plays: int, z: float = 1.0) -> float:
+    """Pessimistic estimate of the win ratio given how often a move was played"""
+    if plays <= 0:
+        return 0.0
+    ratio = wins / plays
+    denominator = 1 + z * z / plays
+    center = ratio + z * z / (2 * plays)
+    margin = z * math.sqrt(ratio * (1 - ratio) / plays + z * z / (4 * plays * plays))
+    return (center - margin) / denominator
+
+class LearnedMoveCache:
+    """LRU cache of precomputed best learned moves, keyed by board key"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, board_key: str):
+        """Return (found, entry); entry is None for positions with no confident move"""
+        if board_key in self.entries:
+            self.entries.move_to_end(board_key)
+            self.hits += 1
+            return True, self.entries[board_key]
+        self.misses += 1
+        return False, None
+
+    def put(self, board_key: str, entry):
+        self.entries[board_key] = entry
+        self.entries.move_to_end(board_key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, board_key: str):
+        self.entries.pop(board_key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+class LearningShard:
+    """(wins, plays) counters per position and move that merge by addition.
+
+    Merging is associative and commutative, so shards learned on separate
+    machines or processes can be combined in any order.  The JSON form is
+    the same as ai_memory.json, so a merged shard can be served directly.
+    """
+
+    def __init__(self, states: Optional[Dict] = None):
+        # board_key -> move_key -> [wins, plays]
+        self.counts = {}
+        if states:
+            self.add_states(states)
+
+    def add(self, board_key: str, move: Tuple[int, int], won: bool, plays: int = 1):
+        moves = self.counts.setdefault(board_key, {})
+        counter = moves.setdefault(f"{move[0]},{move[1]}", [0, 0])
+        counter[0] += plays if won else 0
+        counter[1] += plays
+
+    def add_states(self, states: Dict):
+        """Add counters in ai_memory.json form"""
+        for board_key, moves in states.items():
+            target = self.counts.setdefault(board_key, {})
+            for move_key, stats in moves.items():
+                counter = target.setdefault(move_key, [0, 0])
+                counter[0] += stats.get("wins", 0)
+                counter[1] += stats.get("plays", 0)
+
+    def merge(self, other: 'LearningShard') -> 'LearningShard':
+        """Add another shard's counters into this one"""
+        for board_key, moves in other.counts.items():
+            target = self.counts.setdefault(board_key, {})
+            for move_key, (wins, plays) in moves.items():
+                counter = target.setdefault(move_key, [0, 0])
+                counter[0] += wins
+                counter[1] += plays
+        return self
+
+    def compact(self, min_plays: int = 1, max_positions: Optional[int] = None):
+        """Drop rarely played moves, then keep the most played positions"""
+        for board_key in list(self.counts):
+            moves = {key: counter for key, counter in self.counts[board_key].items()
+                     if counter[1] >= min_plays}
+            if moves:
+                self.counts[board_key] = moves
+            else:
+                del self.counts[board_key]
+        if max_positions is not None and len(self.counts) > max_positions:
+            ranked = sorted(self.counts,
+                            key=lambda key: sum(counter[1] for counter in self.counts[key].values()),
+                            reverse=True)
+            for board_key in ranked[max_positions:]:
+                del self.counts[board_key]
+        return self
+
+    def to_states(self) -> Dict:
+        return {board_key: {move_key: {"wins": wins, "plays": plays}
+                            for move_key, (wins, plays) in moves.items()}
+                for board_key, moves in self.counts.items()}
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_states(), f)
+
+    @classmethod
+    def load(cls, path: str) -> 'LearningShard':
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.counts)
+
+def merge_memory_files(paths: List[str], output: str, min_plays: int = 1,
+                       max_positions: Optional[int] = None) -> LearningShard:
+    """Pool several ai_memory.json stores into one compacted store"""
+    merged = LearningShard()
+    for path in paths:
+        merged.merge(LearningShard.load(path))
+    merged.compact(min_plays, max_positions)
+    merged.save(output)
+    return merged
 
 class AILearning:
-    def __init__(self):
-        self.memory_file = "ai_memory.json"
+    def __init__(self, memory_file: str = "ai_memory.json", max_positions: int = 50000,
+                 min_plays: int = 3, min_confidence: float = 0.4, cache_size: int = 4096):
+        self.memory_file = memory_file
+        self.max_positions = max_positions  # Cap on stored positions
+        self.min_plays = min_plays  # Plays needed before a move can be trusted
+        self.min_confidence = min_confidence  # Minimum Wilson lower bound on the win ratio
+        self.move_cache = LearnedMoveCache(cache_size)
         self.board_states = self.load_memory()
         self.current_game_moves = []
         
@@ -26,7 +167,7 @@ class AILearning:
     
     def board_to_key(self, board: List[List[str]]) -> str:
         """Convert board state to string key"""
-        return ''.join(''.join(cell if cell is not None else '_' for cell in row) for row in board)
+        return board_key(board)
     
     def record_move(self, board: List[List[str]], move: Tuple[int, int]):
         """Record a move for the current game"""
@@ -37,8 +178,6 @@ class AILearning:
     
     def learn_from_game(self, won: bool):
         """Update learning based on game outcome"""
-        reward = 1 if won else -1
-        
         for board_key, move in self.current_game_moves:
             if board_key not in self.board_states:
                 self.board_states[board_key] = {}
@@ -49,40 +188,72 @@ class AILearning:
             
             self.board_states[board_key][move_key]["plays"] += 1
             self.board_states[board_key][move_key]["wins"] += (1 if won else 0)
+            self.move_cache.invalidate(board_key)
         
         self.current_game_moves = []  # Reset for next game
+        self.enforce_position_cap()
         self.save_memory()
     
+    def enforce_position_cap(self):
+        """Drop the least played positions once the store outgrows max_positions"""
+        if len(self.board_states) <= self.max_positions:
+            return
+        # Trim to 90% of the cap so the sort is not repeated after every game
+        keep = int(self.max_positions * 0.9)
+        ranked = sorted(self.board_states,
+                        key=lambda key: sum(stats["plays"] for stats in self.board_states[key].values()),
+                        reverse=True)
+        for board_key in ranked[keep:]:
+            del self.board_states[board_key]
+            self.move_cache.invalidate(board_key)
+    
+    def merge_shard(self, shard: LearningShard):
+        """Pool counters learned elsewhere into this store"""
+        merged = LearningShard(self.board_states).merge(shard)
+        self.board_states = merged.to_states()
+        self.move_cache.clear()
+        self.enforce_position_cap()
+    
+    def build_policy_entry(self, moves: Dict) -> Optional[Tuple[float, List[Tuple[int, int]]]]:
+        """Parse and rank a position's move stats once; None if nothing is confident enough"""
+        best_score = -1
+        best_moves = []
+        for move_key, stats in moves.items():
+            try:
+                plays = stats["plays"]
+                if plays < self.min_plays:
+                    continue
+                score = wilson_lower_bound(stats["wins"], plays)
+                row, col = map(int, move_key.split(','))
+            except (ValueError, KeyError, TypeError):
+                continue
+            if score > best_score:
+                best_score = score
+                best_moves = [(row, col)]
+            elif score == best_score:
+                best_moves.append((row, col))
+        
+        if best_moves and best_score > self.min_confidence:
+            return best_score, best_moves
+        return None
+    
     def get_learned_move(self, board: List[List[str]]) -> Tuple[int, int]:
         """Get move based on learning history"""
         try:
             board_key = self.board_to_key(board)
             
-            if board_key in self.board_states:
-                moves = self.board_states[board_key]
-                best_ratio = -1
-                best_moves = []
-                
-                for move_key, stats in moves.items():
-                    try:
-                        if stats["plays"] > 0:
-                            ratio = stats["wins"] / stats["plays"]
-                            row, col = map(int, move_key.split(','))
-                            
-                            # Verify move is still valid
-                            if 0 <= row < len(board) and 0 <= col < len(board[0]) and board[row][col] is None:
-                                if ratio > best_ratio:
-                                    best_ratio = ratio
-                                    best_moves = [(row, col)]
-                                elif ratio == best_ratio:
-                                    best_moves.append((row, col))
-                    except (ValueError, IndexError):
-                        continue
-                
-                if best_moves and best_ratio > 0.4:  # Only use learned moves if they have decent success
-                    return random.choice(best_moves)
+            found, entry = self.move_cache.get(board_key)
+            if not found:
+                moves = self.board_states.get(board_key)
+                entry = self.build_policy_entry(moves) if moves else None
+                self.move_cache.put(board_key, entry)
+            if entry is None:
+                return None  # No good learned move available
             
-            return None  # No good learned move available
+            # Verify moves are still valid
+            valid = [(row, col) for row, col in entry[1]
+                     if 0 <= row < len(board) and 0 <= col < len(board[0]) and board[row][col] is None]
+            return random.choice(valid) if valid else None
         except Exception as e:
             print(f"Error in get_learned_move: {e}")
-            return None
\ No newline at end of file
+            return None
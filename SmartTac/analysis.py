@@ -0,0 +1,175 @@
+# analysis.py
+"""Multi-PV analysis: the K best moves of a position with scores and lines.
+
+Used for hints, post-game review and analytics.  An Analyzer keeps its
+transposition table between calls, so analyzing consecutive positions of
+a game reuses most of the previous work.
+"""
+import math
+import os
+from collections import namedtuple
+from multiprocessing import Pool
+from constants import *
+from ai_engine import (
+    SCOUT_WIDTH, SEARCH_DEPTH, SearchBudgetExceeded, SearchContext,
+    available_moves, board_key, check_winner, negamax, opponent_of,
+    order_moves, root_bonus, is_mate_score
+)
+from game_record import mark_for_ply, replay
+
+AnalysisLine = namedtuple('AnalysisLine', ['move', 'score', 'pv', 'depth'])
+
+def side_to_move(board):
+    """Mark to move in a position reached by legal play, X first"""
+    return mark_for_ply(sum(cell is not None for row in board for cell in row))
+
+def _check_side(board, mark):
+    # Table keys hold the stones only, so the side to move must follow from them
+    if mark != side_to_move(board):
+        raise ValueError(f"{mark} is not to move in this position")
+
+class Analyzer:
+    """Scores the top moves of positions, sharing one search context across calls"""
+
+    def __init__(self, ctx=None):
+        self.ctx = ctx or SearchContext()
+
+    def analyze(self, board, k=3, max_depth=SEARCH_DEPTH, time_limit=None, mark=None):
+        """Return up to `k` AnalysisLines for `mark` to move, best first.
+
+        Scores are from `mark`'s point of view; for the AI they include the
+        same root bonus best_move() uses.  `mark` defaults to the side to
+        move by stone count; any other mark raises ValueError.  `time_limit` (seconds) covers the
+        whole call; on timeout the deepest finished iteration is returned.
+        """
+        if mark is None:
+            mark = side_to_move(board)
+        _check_side(board, mark)
+        board = [row[:] for row in board]
+        moves = available_moves(board)
+        if not moves or check_winner(board):
+            return []
+        ctx = SearchContext(shared=self.ctx, time_limit=time_limit)
+
+        bonuses = {}
+        for (i, j) in moves:
+            board[i][j] = mark
+            bonuses[(i, j)] = root_bonus(board, (i, j)) if mark == AI else 0
+            board[i][j] = None
+
+        root_moves = order_moves(board, moves, mark)
+        lines = []
+        for depth in range(1, max_depth + 1):
+            try:
+                scored = self._search_depth(board, depth, k, mark, root_moves, bonuses, ctx)
+            except SearchBudgetExceeded:
+                break
+            lines = [AnalysisLine(move, score, self._principal_variation(board, move, mark, depth), depth)
+                     for move, score in scored]
+            # Search this iteration's ranking first next time
+            ranked = [move for move, _ in scored]
+            root_moves = ranked + [move for move in root_moves if move not in ranked]
+        return lines
+
+    def _search_depth(self, board, depth, k, mark, root_moves, bonuses, ctx):
+        """Exact scores for the best `k` root moves; the rest only need to lose to them"""
+        other = opponent_of(mark)
+        top = []  # (score, move), best first
+        for (i, j) in root_moves:
+            bonus = bonuses[(i, j)]
+            board[i][j] = mark
+            try:
+                if len(top) < k:
+                    score = -negamax(board, depth - 1, -math.inf, math.inf, other, 1, ctx)
+                else:
+                    # Null-window test against the current k-th best move
+                    bound = top[-1][0] - bonus
+                    score = -negamax(board, depth - 1, -bound - SCOUT_WIDTH, -bound, other, 1, ctx)
+                    if score > bound:
+                        score = -negamax(board, depth - 1, -math.inf, math.inf, other, 1, ctx)
+                    else:
+                        continue
+            finally:
+                board[i][j] = None
+            if not is_mate_score(score):
+                score += bonus
+            top.append((score, (i, j)))
+            top.sort(key=lambda item: -item[0])
+            del top[k:]
+        return [(move, score) for score, move in top]
+
+    def _principal_variation(self, board, move, mark, depth):
+        """Follow table moves from `move` to rebuild the expected line"""
+        pv = [move]
+        played = [move]
+        board[move[0]][move[1]] = mark
+        side = opponent_of(mark)
+        try:
+            while len(pv) < depth and not check_winner(board):
+                entry = self.ctx.tt.get(board_key(board))
+                if not entry or entry[3] is None:
+                    break
+                i, j = entry[3]
+                if board[i][j] is not None:
+                    break
+                board[i][j] = side
+                played.append((i, j))
+                pv.append((i, j))
+                side = opponent_of(side)
+        finally:
+            for (i, j) in played:
+                board[i][j] = None
+        return pv
+
+    def clear(self):
+        self.ctx.clear()
+
+# --- Batch analysis ---
+_worker_analyzer = None
+
+def _init_worker():
+    global _worker_analyzer
+    _worker_analyzer = Analyzer()
+
+def _analyze_task(task):
+    board, k, max_depth, time_limit, mark = task
+    return _worker_analyzer.analyze(board, k, max_depth, time_limit, mark)
+
+def analyze_batch(positions, k=3, max_depth=SEARCH_DEPTH, time_limit=None, workers=None):
+    """Analyze many positions across a process pool; `positions` holds boards or (board, mark).
+
+    A bare board is analyzed for the side to move.
+
+    Each worker keeps one Analyzer, and consecutive positions go to the same
+    worker in chunks, so positions from one game share a table.
+    """
+    tasks = []
+    for position in positions:
+        if isinstance(position, tuple):
+            board, mark = position
+            # Fail before any work is sent to the pool
+            _check_side(board, mark)
+        else:
+            board, mark = position, side_to_move(position)
+        tasks.append(([row[:] for row in board], k, max_depth, time_limit, mark))
+    if workers == 1 or len(tasks) <= 1:
+        _init_worker()
+        return [_analyze_task(task) for task in tasks]
+    with Pool(workers, initializer=_init_worker) as pool:
+        chunksize = max(1, len(tasks) // ((workers or os.cpu_count() or 1) * 4))
+        return pool.map(_analyze_task, tasks, chunksize)
+
+def analyze_games(records, k=3, max_depth=SEARCH_DEPTH, time_limit=None, workers=None, mark=AI):
+    """Review recorded games: for each game, a list of (ply, move played, lines) for `mark`'s moves"""
+    records = list(records)
+    positions, index = [], []
+    for game, record in enumerate(records):
+        for ply, (board, side, move) in enumerate(replay(record)):
+            if side == mark and not check_winner(board):
+                positions.append(([row[:] for row in board], mark))
+                index.append((game, ply, move))
+    results = analyze_batch(positions, k, max_depth, time_limit, workers)
+    reviews = {}
+    for (game, ply, move), lines in zip(index, results):
+        reviews.setdefault(game, []).append((ply, move, lines))
+    return [reviews.get(game, []) for game in range(len(records))]
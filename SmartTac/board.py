@@ -6,6 +6,13 @@ from constants import (
     PLAYER, AI, FONT_NAME, FONT_SIZE
 )
 from ai_engine import check_winner, available_moves, best_move, ai_learning
+from ponder import Ponderer
+from difficulty import AdaptiveDifficulty
+from game_record import (
+    GameRecordWriter, GameRecorder, DEFAULT_RECORD_FILE,
+    RESULT_DRAW, RESULT_PLAYER_WIN, RESULT_AI_WIN, RESULT_UNFINISHED,
+    FLAG_LEARNING, FLAG_PONDERING, FLAG_STORE_UPDATED
+)
 import time
 
 class Board:
@@ -52,6 +59,15 @@ class Board:
         self.game_over = False
         self.winner_cells = []
         
+        # Searches the player's likely replies while they think
+        self.ponderer = Ponderer()
+        
+        # Difficulty follows the player's results
+        self.difficulty = AdaptiveDifficulty()
+        
+        # Every game is appended to the record file
+        self.recorder = GameRecorder(GameRecordWriter(DEFAULT_RECORD_FILE))
+        
         # Create top control panel frame for New Game button
         self.top_control_panel = tk.Frame(self.main_frame)
         self.top_control_panel.pack(fill='x', pady=(0, 10))
@@ -108,6 +124,14 @@ class Board:
         )
         self.ai_score_label.pack(side=tk.LEFT, padx=20)
         
+        # Difficulty label
+        self.level_label = tk.Label(
+            self.score_frame,
+            font=(FONT_NAME, 14)
+        )
+        self.level_label.pack(side=tk.LEFT, padx=20)
+        self.apply_difficulty()
+        
         self.current_player = PLAYER
         self.draw_board()
 
@@ -164,6 +188,7 @@ class Board:
             
         # Make player's move
         self.grid[row][col] = PLAYER
+        self.recorder.add_move((row, col))
         self.draw_board()
         
         # Check if game ended after player's move
@@ -194,7 +219,12 @@ class Board:
         if self.game_over or self.current_player != AI:
             return
             
-        move = best_move(self.grid)
+        # The search below reuses what pondering found, so stop it first
+        self.ponderer.stop()
+        profile = self.difficulty.profile
+        start = time.perf_counter()
+        move = best_move(self.grid, profile)
+        elapsed = time.perf_counter() - start
         if not move:  # No valid moves available
             self.check_game_end()  # Will handle tie game
             return
@@ -210,12 +240,17 @@ class Board:
             
         # Make AI's move
         self.grid[row][col] = AI
+        self.recorder.add_move(move, elapsed)
         self.draw_board()
         
         # Check game end and update state
         if not self.check_game_end():
             self.current_player = PLAYER
             self.status_label.config(text="Your turn (X)")
+            if profile.ponder:
+                self.ponderer.depth = profile.max_depth
+                self.ponderer.profile = profile
+                self.ponderer.start(self.grid)
 
     def check_game_end(self):
         """Check if the game has ended"""
@@ -224,25 +259,33 @@ class Board:
             winner = check_winner(self.grid)
             if winner:
                 self.game_over = True
+                # Nothing left to ponder once the game is decided
+                self.ponderer.stop()
                 if winner == PLAYER:
                     self.player_score += 1
                     self.status_label.config(text="You win!")
                     # AI learns from loss
                     ai_learning.learn_from_game(False)
+                    self.recorder.finish(RESULT_PLAYER_WIN, FLAG_STORE_UPDATED)
                 else:
                     self.ai_score += 1
                     self.status_label.config(text="AI wins!")
                     # AI learns from win
                     ai_learning.learn_from_game(True)
+                    self.recorder.finish(RESULT_AI_WIN, FLAG_STORE_UPDATED)
                 self.update_score_labels()
+                self.update_difficulty()
                 return True
                 
             # Check for tie
             if not available_moves(self.grid):
                 self.game_over = True
+                self.ponderer.stop()
                 self.status_label.config(text="It's a tie!")
                 # AI learns from tie (consider it a partial success)
                 ai_learning.learn_from_game(True)
+                self.recorder.finish(RESULT_DRAW, FLAG_STORE_UPDATED)
+                self.update_difficulty()
                 return True
                 
             return False
@@ -255,8 +298,25 @@ class Board:
         self.player_score_label.config(text=f"You: {self.player_score}")
         self.ai_score_label.config(text=f"AI: {self.ai_score}")
 
+    def update_difficulty(self):
+        """Let the adaptive controller react to the game that just ended"""
+        if self.difficulty.update(self.player_score, self.ai_score):
+            self.apply_difficulty()
+
+    def apply_difficulty(self):
+        """Show the current level and stamp it on the games being recorded"""
+        profile = self.difficulty.profile
+        self.level_label.config(text=f"Level: {profile.name}")
+        self.recorder.profile = profile.level
+        self.recorder.depth = profile.max_depth
+        self.recorder.flags = ((FLAG_LEARNING if profile.use_learning else 0) |
+                               (FLAG_PONDERING if profile.ponder else 0))
+
     def reset_game(self):
         """Reset the game state"""
+        self.ponderer.stop()
+        if not self.game_over:
+            self.recorder.finish(RESULT_UNFINISHED)
         self.grid = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
         self.current_player = PLAYER
         self.game_over = False
@@ -0,0 +1,177 @@
+# dataset_export.py
+"""Export positions and outcomes as memory-mapped NumPy arrays.
+
+Sources are game records or a learning store (ai_memory.json).  The
+exporter makes two streaming passes, one to count rows and one to fill
+.npy files opened as memory maps, so datasets larger than RAM are fine.
+Arrays written to the output directory:
+
+    boards.npy   (N, 36) int8     1 player (X), -1 AI (O), 0 empty
+    side.npy     (N,)    int8     side to move, same encoding
+    move.npy     (N,)    int8     move played, row * BOARD_SIZE + col
+    result.npy   (N,)    float32  outcome for the side to move, -1..1
+    visits.npy   (N,)    int32    games behind the row (plays for a store)
+
+Requires numpy.
+"""
+import json
+import os
+import numpy as np
+from constants import *
+from game_record import (
+    iter_records, replay, encode_move,
+    RESULT_AI_WIN, RESULT_DRAW, RESULT_PLAYER_WIN
+)
+
+CELLS = BOARD_SIZE * BOARD_SIZE
+CELL_VALUES = {PLAYER: 1, AI: -1, None: 0}
+KEY_VALUES = {PLAYER: 1, AI: -1, '_': 0}
+ARRAYS = {
+    'boards': (np.int8, (CELLS,)),
+    'side': (np.int8, ()),
+    'move': (np.int8, ()),
+    'result': (np.float32, ()),
+    'visits': (np.int32, ()),
+}
+# Outcome for X; negated when O is to move
+RESULT_FOR_PLAYER = {RESULT_PLAYER_WIN: 1.0, RESULT_AI_WIN: -1.0, RESULT_DRAW: 0.0}
+
+def _build_symmetries():
+    """Cell permutations of the 8 rotations and reflections of the board"""
+    last = BOARD_SIZE - 1
+    transforms = [
+        lambda r, c: (r, c), lambda r, c: (c, last - r),
+        lambda r, c: (last - r, last - c), lambda r, c: (last - c, r),
+        lambda r, c: (r, last - c), lambda r, c: (last - r, c),
+        lambda r, c: (c, r), lambda r, c: (last - c, last - r),
+    ]
+    symmetries = []
+    for transform in transforms:
+        permutation = [0] * CELLS
+        for r in range(BOARD_SIZE):
+            for c in range(BOARD_SIZE):
+                tr, tc = transform(r, c)
+                permutation[tr * BOARD_SIZE + tc] = r * BOARD_SIZE + c
+        symmetries.append(permutation)
+    return symmetries
+
+SYMMETRIES = _build_symmetries()
+# Where each cell index lands under every symmetry, for moving the move label
+SYMMETRY_TARGETS = [[permutation.index(cell) for cell in range(CELLS)] for permutation in SYMMETRIES]
+
+# --- Sources: each yields (cells, side, move index, result, visits) ---
+def record_samples(paths):
+    """One row per move of every finished recorded game"""
+    for path in paths:
+        for record in iter_records(path):
+            outcome = RESULT_FOR_PLAYER.get(record.result)
+            if outcome is None:
+                continue
+            for board, mark, move in replay(record):
+                cells = [CELL_VALUES[cell] for row in board for cell in row]
+                side = CELL_VALUES[mark]
+                yield cells, side, encode_move(move), outcome * side, 1
+
+def store_samples(path):
+    """One row per (position, move) of a learning store; the AI is always to move"""
+    with open(path, 'r') as f:
+        states = json.load(f)
+    side = CELL_VALUES[AI]
+    for board_key, moves in states.items():
+        cells = [KEY_VALUES[cell] for cell in board_key]
+        for move_key, stats in moves.items():
+            plays = stats.get("plays", 0)
+            if plays <= 0:
+                continue
+            row, col = map(int, move_key.split(','))
+            # wins counts ties as successes, as learn_from_game does
+            yield cells, side, row * BOARD_SIZE + col, 2 * stats["wins"] / plays - 1, plays
+
+# --- Export ---
+def export_dataset(samples, out_dir, augment=False, chunk_size=65536):
+    """Write samples to memory-mapped arrays in `out_dir`; returns the row count.
+
+    `samples` is a zero-argument callable returning a fresh sample iterator,
+    since the data is streamed twice.
+    """
+    copies = len(SYMMETRIES) if augment else 1
+    rows = copies * sum(1 for _ in samples())
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        name: np.lib.format.open_memmap(os.path.join(out_dir, f"{name}.npy"), mode='w+',
+                                        dtype=dtype, shape=(rows,) + shape)
+        for name, (dtype, shape) in ARRAYS.items()
+    }
+
+    permutations = np.array(SYMMETRIES[:copies])
+    targets = np.array(SYMMETRY_TARGETS[:copies])
+    buffers = {name: [] for name in ARRAYS}
+    written = 0
+
+    def flush():
+        nonlocal written
+        if not buffers['side']:
+            return
+        boards = np.array(buffers['boards'], dtype=np.int8)
+        moves = np.array(buffers['move'], dtype=np.int64)
+        # Every symmetry of the buffer, laid out symmetry by symmetry
+        block = {
+            'boards': boards[:, permutations].transpose(1, 0, 2).reshape(-1, CELLS),
+            'move': targets[:, moves].reshape(-1),
+            'side': np.tile(np.array(buffers['side'], dtype=np.int8), copies),
+            'result': np.tile(np.array(buffers['result'], dtype=np.float32), copies),
+            'visits': np.tile(np.array(buffers['visits'], dtype=np.int32), copies),
+        }
+        count = len(block['side'])
+        for name, values in block.items():
+            arrays[name][written:written + count] = values
+        written += count
+        for values in buffers.values():
+            values.clear()
+
+    for cells, side, move, result, visits in samples():
+        buffers['boards'].append(cells)
+        buffers['side'].append(side)
+        buffers['move'].append(move)
+        buffers['result'].append(result)
+        buffers['visits'].append(visits)
+        if len(buffers['side']) * copies >= chunk_size:
+            flush()
+    flush()
+
+    for array in arrays.values():
+        array.flush()
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({'rows': rows, 'augmented': augment, 'board_size': BOARD_SIZE}, f)
+    return rows
+
+# --- Loading ---
+def load_dataset(out_dir):
+    """Open every array read-only as a memory map"""
+    return {name: np.load(os.path.join(out_dir, f"{name}.npy"), mmap_mode='r') for name in ARRAYS}
+
+def iter_dataset(out_dir, chunk_size=65536):
+    """Yield dicts of consecutive row slices; slices of a memory map are views, not copies"""
+    arrays = load_dataset(out_dir)
+    rows = len(arrays['side'])
+    for start in range(0, rows, chunk_size):
+        yield {name: array[start:start + chunk_size] for name, array in arrays.items()}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export SmartTac positions to NumPy arrays")
+    parser.add_argument('out_dir', help="Directory for the .npy files")
+    parser.add_argument('--records', nargs='*', default=[], help="Game record files")
+    parser.add_argument('--store', help="Learning store such as ai_memory.json")
+    parser.add_argument('--augment', action='store_true', help="Add all 8 board symmetries")
+    parser.add_argument('--chunk-size', type=int, default=65536, help="Rows written per block")
+    args = parser.parse_args()
+    if bool(args.records) == bool(args.store):
+        parser.error("give either --records or --store")
+
+    if args.store:
+        source = lambda: store_samples(args.store)
+    else:
+        source = lambda: record_samples(args.records)
+    rows = export_dataset(source, args.out_dir, args.augment, args.chunk_size)
+    print(f"Wrote {rows} rows to {args.out_dir}")
@@ -0,0 +1,83 @@
+# difficulty.py
+"""Difficulty levels expressed as compute budgets.
+
+Each profile bounds how much work best_move() may do: search depth, node
+and time limits, how many candidate moves are searched at each node, and
+whether the threat search, learned moves and pondering run at all.  Easy
+games therefore cost a small fraction of the CPU of hard ones.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+@dataclass(frozen=True)
+class DifficultyProfile:
+    name: str
+    level: int  # Stored in game records
+    max_depth: int  # Plies searched from the root
+    max_nodes: Optional[int] = None  # Search node budget per move
+    time_limit: Optional[float] = None  # Seconds per move
+    candidate_width: Optional[int] = None  # Best-ordered moves kept at each node
+    lmr_start: Optional[int] = None  # Move index where late move reductions begin
+    futility_margin: Optional[float] = None  # Frontier pruning margin; saves nodes, not time
+    noise: float = 0.0  # Chance of playing a random candidate instead of searching
+    threat_search: bool = True  # Look for forced wins and forced defenses
+    use_learning: bool = True  # Play learned moves
+    ponder: bool = True  # Search on the player's time
+
+PROFILES = [
+    DifficultyProfile('Easy', 0, max_depth=1, max_nodes=200, candidate_width=6, noise=0.3,
+                      threat_search=False, use_learning=False, ponder=False),
+    DifficultyProfile('Medium', 1, max_depth=2, max_nodes=2000, candidate_width=10, noise=0.1,
+                      use_learning=False, ponder=False),
+    DifficultyProfile('Hard', 2, max_depth=4),
+    DifficultyProfile('Expert', 3, max_depth=6, time_limit=3.0),
+]
+DEFAULT_LEVEL = 2  # Hard: the engine's full strength before difficulty levels
+
+def get_profile(level):
+    return PROFILES[max(0, min(level, len(PROFILES) - 1))]
+
+class AdaptiveDifficulty:
+    """Moves the player between profiles based on their recent results.
+
+    Fed with Board's running scores after each game.  The level goes up
+    when the player wins `promote_wins` of the last `window` games and down
+    when the AI wins all of them.
+    """
+
+    def __init__(self, level=DEFAULT_LEVEL, window=3, promote_wins=2):
+        self.level = level
+        self.window = window
+        self.promote_wins = promote_wins
+        self.recent = []  # 1 player win, -1 AI win, 0 draw
+        self.last_scores = (0, 0)
+
+    @property
+    def profile(self):
+        return get_profile(self.level)
+
+    def update(self, player_score, ai_score):
+        """Record the game that just ended; returns True if the level changed"""
+        last_player, last_ai = self.last_scores
+        self.last_scores = (player_score, ai_score)
+        if player_score > last_player:
+            result = 1
+        elif ai_score > last_ai:
+            result = -1
+        else:
+            result = 0
+        self.recent = (self.recent + [result])[-self.window:]
+        if len(self.recent) < self.window:
+            return False
+
+        level = self.level
+        if self.recent.count(1) >= self.promote_wins:
+            level += 1
+        elif self.recent.count(-1) == self.window:
+            level -= 1
+        level = max(0, min(level, len(PROFILES) - 1))
+        if level == self.level:
+            return False
+        self.level = level
+        self.recent = []
+        return True
@@ -0,0 +1,274 @@
+# game_record.py
+"""Compact binary game records.
+
+A record file starts with an 8-byte file header (magic, version, board
+size).  Each game follows as a fixed 15-byte header and then one byte per
+move (row * BOARD_SIZE + col).  The player (X) always moves first, so the
+side of every move follows from its index.  Files are append-only, so any
+number of games can be streamed back without loading the file.
+"""
+import os
+import struct
+import time
+from collections import namedtuple
+from multiprocessing import Pool
+from constants import *
+
+DEFAULT_RECORD_FILE = "game_records.bin"
+
+MAGIC = b'STGR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sBB2x')
+# result, move count, search depth, difficulty profile, flags,
+# start time (unix seconds), total AI think time (ms), slowest AI move (ms)
+RECORD_HEADER = struct.Struct('<BBBBBIIH')
+
+RESULT_DRAW = 0
+RESULT_PLAYER_WIN = 1
+RESULT_AI_WIN = 2
+RESULT_UNFINISHED = 3
+RESULT_NAMES = {
+    RESULT_DRAW: 'draw',
+    RESULT_PLAYER_WIN: 'player',
+    RESULT_AI_WIN: 'ai',
+    RESULT_UNFINISHED: 'unfinished',
+}
+
+# Record flags
+FLAG_LEARNING = 1  # The AI used its learned moves
+FLAG_PONDERING = 2  # The AI pondered on the player's time
+FLAG_HEADLESS = 4  # Played without the GUI
+FLAG_STORE_UPDATED = 8  # The game's outcome was added to the learning store
+
+GameRecord = namedtuple('GameRecord', [
+    'result', 'moves', 'depth', 'profile', 'flags',
+    'started_at', 'ai_time_ms', 'max_move_ms'
+])
+
+def encode_move(move):
+    return move[0] * BOARD_SIZE + move[1]
+
+def decode_move(value):
+    return divmod(value, BOARD_SIZE)
+
+def mark_for_ply(ply):
+    """Mark that plays move number `ply` (0-based)"""
+    return PLAYER if ply % 2 == 0 else AI
+
+def replay(record):
+    """Yield (board, mark, move) before each move of a record; the board is reused"""
+    board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    for ply, move in enumerate(record.moves):
+        mark = mark_for_ply(ply)
+        yield board, mark, move
+        board[move[0]][move[1]] = mark
+
+# --- Writing ---
+class GameRecordWriter:
+    """Appends records to a file, writing the file header on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, BOARD_SIZE))
+            self.file.flush()
+
+    def write(self, record):
+        self.file.write(RECORD_HEADER.pack(
+            record.result, len(record.moves), record.depth, record.profile, record.flags,
+            int(record.started_at), min(int(record.ai_time_ms), 0xFFFFFFFF),
+            min(int(record.max_move_ms), 0xFFFF)
+        ))
+        self.file.write(bytes(encode_move(move) for move in record.moves))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class GameRecorder:
+    """Collects one game's moves and AI timings, then hands it to a writer"""
+
+    def __init__(self, writer, depth=0, profile=0, flags=0):
+        self.writer = writer
+        self.depth = depth
+        self.profile = profile
+        self.flags = flags
+        self.start()
+
+    def start(self):
+        self.moves = []
+        self.started_at = time.time()
+        self.ai_time = 0.0
+        self.max_move_time = 0.0
+
+    def add_move(self, move, elapsed=None):
+        """Add a move; `elapsed` is the AI's think time in seconds"""
+        self.moves.append(tuple(move))
+        if elapsed is not None:
+            self.ai_time += elapsed
+            self.max_move_time = max(self.max_move_time, elapsed)
+
+    def finish(self, result, flags=0):
+        """Write the game and start a new one; `flags` are added for this game only.
+
+        Empty games are dropped.
+        """
+        if self.moves:
+            self.writer.write(GameRecord(
+                result, self.moves, self.depth, self.profile, self.flags | flags,
+                self.started_at, self.ai_time * 1000, self.max_move_time * 1000
+            ))
+            self.writer.flush()
+        self.start()
+
+# --- Reading ---
+def _read_file_header(f):
+    data = f.read(FILE_HEADER.size)
+    if len(data) < FILE_HEADER.size:
+        return False
+    magic, version, board_size = FILE_HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or board_size != BOARD_SIZE:
+        raise ValueError(f"Not a {BOARD_SIZE}x{BOARD_SIZE} game record file: {f.name}")
+    return True
+
+def iter_records(path, offset=None, count=None):
+    """Stream records from `path`, optionally `count` of them starting at byte `offset`"""
+    with open(path, 'rb') as f:
+        if not _read_file_header(f):
+            return
+        if offset is not None:
+            f.seek(offset)
+        read = 0
+        while count is None or read < count:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return  # End of file, or a record cut short by a crash
+            result, move_count, depth, profile, flags, started_at, ai_ms, max_ms = \
+                RECORD_HEADER.unpack(header)
+            data = f.read(move_count)
+            if len(data) < move_count:
+                return
+            yield GameRecord(result, [decode_move(value) for value in data], depth, profile,
+                             flags, started_at, ai_ms, max_ms)
+            read += 1
+
+def scan_chunks(path, chunk_size=10000):
+    """Split a file into (path, offset, count) chunks by skipping over move bytes"""
+    chunks = []
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        if not _read_file_header(f):
+            return chunks
+        offset = f.tell()
+        start, count = offset, 0
+        while offset + RECORD_HEADER.size <= size:
+            header = f.read(RECORD_HEADER.size)
+            move_count = header[1]
+            if offset + RECORD_HEADER.size + move_count > size:
+                break
+            offset += RECORD_HEADER.size + move_count
+            f.seek(offset)
+            count += 1
+            if count == chunk_size:
+                chunks.append((path, start, count))
+                start, count = offset, 0
+    if count:
+        chunks.append((path, start, count))
+    return chunks
+
+# --- Bulk analysis ---
+def _empty_stats():
+    return {
+        'games': 0,
+        'results': {name: 0 for name in RESULT_NAMES.values()},
+        'openings': {},  # "r,c r,c" of the first two moves -> result counts
+        'ai_moves': 0,
+        'ai_time_ms': 0,
+        'max_move_ms': 0,
+        'total_moves': 0,
+    }
+
+def analyze_chunk(chunk):
+    """Statistics for one (path, offset, count) chunk"""
+    path, offset, count = chunk
+    stats = _empty_stats()
+    for record in iter_records(path, offset, count):
+        name = RESULT_NAMES.get(record.result, 'unfinished')
+        stats['games'] += 1
+        stats['results'][name] += 1
+        stats['total_moves'] += len(record.moves)
+        stats['ai_moves'] += len(record.moves) // 2
+        stats['ai_time_ms'] += record.ai_time_ms
+        stats['max_move_ms'] = max(stats['max_move_ms'], record.max_move_ms)
+        opening = ' '.join(f"{r},{c}" for r, c in record.moves[:2])
+        results = stats['openings'].setdefault(opening, {})
+        results[name] = results.get(name, 0) + 1
+    return stats
+
+def merge_stats(total, part):
+    """Fold `part` into `total`; merging is associative so chunks can finish in any order"""
+    total['games'] += part['games']
+    for name, value in part['results'].items():
+        total['results'][name] = total['results'].get(name, 0) + value
+    for opening, results in part['openings'].items():
+        merged = total['openings'].setdefault(opening, {})
+        for name, value in results.items():
+            merged[name] = merged.get(name, 0) + value
+    total['ai_moves'] += part['ai_moves']
+    total['ai_time_ms'] += part['ai_time_ms']
+    total['max_move_ms'] = max(total['max_move_ms'], part['max_move_ms'])
+    total['total_moves'] += part['total_moves']
+    return total
+
+def analyze_records(paths, workers=None, chunk_size=10000):
+    """Analyze record files in parallel chunks and return merged statistics"""
+    chunks = [chunk for path in paths for chunk in scan_chunks(path, chunk_size)]
+    total = _empty_stats()
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            merge_stats(total, analyze_chunk(chunk))
+        return total
+    with Pool(workers) as pool:
+        for part in pool.imap_unordered(analyze_chunk, chunks):
+            merge_stats(total, part)
+    return total
+
+def format_report(stats, top=10):
+    """Human-readable summary of analyze_records() output"""
+    games = stats['games']
+    lines = [f"Games: {games}"]
+    if not games:
+        return '\n'.join(lines)
+    for name, value in stats['results'].items():
+        lines.append(f"  {name}: {value} ({100 * value / games:.1f}%)")
+    if stats['ai_moves']:
+        lines.append(f"Average AI move: {stats['ai_time_ms'] / stats['ai_moves']:.1f} ms "
+                     f"(slowest {stats['max_move_ms']} ms)")
+    lines.append(f"Average game length: {stats['total_moves'] / games:.1f} moves")
+    lines.append("Openings by frequency (player/ai/draw win rates):")
+    ranked = sorted(stats['openings'].items(), key=lambda item: -sum(item[1].values()))
+    for opening, results in ranked[:top]:
+        played = sum(results.values())
+        rates = '/'.join(f"{100 * results.get(name, 0) / played:.0f}%"
+                         for name in ('player', 'ai', 'draw'))
+        lines.append(f"  {opening}: {played} games, {rates}")
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Analyze SmartTac game records")
+    parser.add_argument('paths', nargs='+', help="Record files")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Games per chunk")
+    parser.add_argument('--top', type=int, default=10, help="Openings to list")
+    args = parser.parse_args()
+    print(format_report(analyze_records(args.paths, args.workers, args.chunk_size), args.top))
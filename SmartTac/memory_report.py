@@ -0,0 +1,149 @@
+# memory_report.py
+"""Memory accounting for the engine's caches and stores.
+
+memory_report() lists every long-lived table with its entry count, its
+configured cap and an approximate size in bytes, so growth can be pinned
+on a specific structure.  Sizes come from sys.getsizeof over the entries;
+large tables are measured on a sample and scaled up.  tracemalloc
+snapshots are available on demand for allocation-level detail.
+"""
+import itertools
+import os
+import sys
+import tracemalloc
+from collections import namedtuple
+from ai_engine import (
+    REPLY_CACHE_MAX_ENTRIES, _profile_contexts, ai_learning, search_context
+)
+from threat_search import threat_searcher
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CacheStats = namedtuple('CacheStats', ['name', 'entries', 'cap', 'bytes'])
+
+SIZE_SAMPLE = 1000  # Entries per measured batch before scaling up
+
+def approximate_size(obj, sample=SIZE_SAMPLE):
+    """Bytes held by a container and everything in it; `sample=None` measures every entry"""
+    seen = set()
+
+    def size(item):
+        if id(item) in seen:
+            return 0
+        seen.add(id(item))
+        total = sys.getsizeof(item)
+        if isinstance(item, dict):
+            # Keys and values themselves: the pairs items() makes are temporary
+            children, count = itertools.chain.from_iterable(item.items()), 2 * len(item)
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            children, count = item, len(item)
+        else:
+            return total
+        if sample and count > 2 * sample:
+            children = iter(children)
+            # The first batch also pays for objects shared between entries
+            # (interned keys, small ints), so scale up from the second one
+            total += sum(size(child) for child in itertools.islice(children, sample))
+            marginal = sum(size(child) for child in itertools.islice(children, sample))
+            return total + marginal + marginal * (count - 2 * sample) // sample
+        return total + sum(size(child) for child in children)
+
+    return size(obj)
+
+def engine_caches():
+    """(name, container, cap) for every cache and store that lives across moves"""
+    caches = [
+        ('search.tt', search_context.tt, search_context.max_tt_entries),
+        ('search.replies', search_context.replies, REPLY_CACHE_MAX_ENTRIES),
+    ]
+    for name, ctx in sorted(_profile_contexts.items()):
+        # Profiles that do not prune share search.tt
+        if ctx.tt is not search_context.tt:
+            caches.append((f'search.{name}.tt', ctx.tt, ctx.max_tt_entries))
+        caches.append((f'search.{name}.replies', ctx.replies, REPLY_CACHE_MAX_ENTRIES))
+    caches += [
+        ('threat.failed', threat_searcher.failed, threat_searcher.max_memo),
+        ('learning.board_states', ai_learning.board_states, ai_learning.max_positions),
+        ('learning.move_cache', ai_learning.move_cache.entries, ai_learning.move_cache.max_entries),
+        ('learning.current_game', ai_learning.current_game_moves, None),
+    ]
+    return caches
+
+def memory_report(sample=SIZE_SAMPLE):
+    """CacheStats for every engine cache"""
+    return [CacheStats(name, len(container), cap, approximate_size(container, sample))
+            for name, container, cap in engine_caches()]
+
+def over_caps(stats, byte_caps=None):
+    """Warnings for tables past their entry cap or past a byte cap from `byte_caps` (name -> bytes)"""
+    byte_caps = byte_caps or {}
+    warnings = []
+    for entry in stats:
+        if entry.cap is not None and entry.entries > entry.cap:
+            warnings.append(f"{entry.name}: {entry.entries} entries, cap {entry.cap}")
+        limit = byte_caps.get(entry.name)
+        if limit is not None and entry.bytes > limit:
+            warnings.append(f"{entry.name}: {entry.bytes} bytes, cap {limit}")
+    return warnings
+
+def process_rss():
+    """Resident set size of this process in bytes, or None if it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # Peak rather than current; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    return None
+
+# --- tracemalloc ---
+def take_snapshot(frames=1):
+    """tracemalloc snapshot, starting tracing first if needed.
+
+    Only allocations made after tracing starts are seen, so call this once
+    early and again later to compare.
+    """
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return tracemalloc.take_snapshot()
+
+def top_allocations(snapshot, previous=None, limit=10, key_type='lineno'):
+    """The largest allocation sites, or the largest growth since `previous`, as text lines"""
+    if previous is not None:
+        stats = snapshot.compare_to(previous, key_type)
+    else:
+        stats = snapshot.statistics(key_type)
+    return [str(stat) for stat in stats[:limit]]
+
+def format_size(size):
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def format_report(stats):
+    lines = [f"{'cache':<28} {'entries':>9} {'cap':>9} {'size':>10}"]
+    for entry in stats:
+        cap = '-' if entry.cap is None else entry.cap
+        lines.append(f"{entry.name:<28} {entry.entries:>9} {cap:>9} {format_size(entry.bytes):>10}")
+    rss = process_rss()
+    if rss is not None:
+        lines.append(f"Process RSS: {format_size(rss)}")
+    return '\n'.join(lines)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Report the size of the engine's caches and stores")
+    parser.add_argument('--exact', action='store_true', help="Measure every entry instead of a sample")
+    args = parser.parse_args()
+    stats = memory_report(None if args.exact else SIZE_SAMPLE)
+    print(format_report(stats))
+    for warning in over_caps(stats):
+        print(f"Over cap: {warning}")
@@ -0,0 +1,71 @@
+# ponder.py
+"""Pondering: search the player's likely replies while they think.
+
+Results land in the shared transposition table and in the reply cache of
+the engine's search context (or of the difficulty profile being played),
+so when the predicted position arrives best_move() answers from the cache
+instead of searching again.
+"""
+import threading
+from constants import *
+from ai_engine import (
+    SearchAborted, SearchContext, available_moves, board_key, check_winner,
+    order_moves, profile_context, search_context, search_root, SEARCH_DEPTH
+)
+
+class Ponderer:
+    """Runs reply searches in a daemon thread that can be cancelled at any node"""
+
+    def __init__(self, depth=SEARCH_DEPTH, max_replies=None, ctx=search_context, profile=None):
+        self.depth = depth
+        self.max_replies = max_replies  # None searches every reply
+        self.ctx = ctx
+        self.profile = profile  # When set, search with this profile's pruning and tables
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.searched = 0
+
+    def start(self, board):
+        """Start pondering the player's replies to `board`"""
+        self.stop()
+        self.stop_event = threading.Event()
+        # The GUI keeps mutating its grid, so search a private copy
+        grid = [row[:] for row in board]
+        self.thread = threading.Thread(target=self._run, args=(grid, self.stop_event), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Cancel pondering and wait for the worker to leave the search"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def _run(self, board, stop_event):
+        if self.profile is not None:
+            # No node or time budget: pondering runs until it is stopped
+            ctx = profile_context(self.profile, budget=False)
+            ctx.stop_event = stop_event
+        else:
+            ctx = SearchContext(self.ctx.max_tt_entries, shared=self.ctx, stop_event=stop_event)
+        # The player's most forcing and central replies are the likeliest
+        replies = order_moves(board, available_moves(board), PLAYER)
+        if self.max_replies is not None:
+            replies = replies[:self.max_replies]
+        self.searched = 0
+        try:
+            for (i, j) in replies:
+                if stop_event.is_set():
+                    return
+                board[i][j] = PLAYER
+                cached = ctx.replies.get(board_key(board))
+                if not check_winner(board) and available_moves(board) and \
+                        not (cached and cached[2] >= self.depth):
+                    search_root(board, self.depth, ctx)
+                    self.searched += 1
+                board[i][j] = None
+        except SearchAborted:
+            return
@@ -0,0 +1,133 @@
+# search_bench.py
+"""Measure forward pruning against the full-width search.
+
+Each position is searched twice: by the plain PVS search and by a search
+with late move reductions and/or futility pruning (optionally deeper).
+The pruned search's move is then scored exactly by the plain search at
+the baseline depth, so the strength given up is a number rather than a
+guess.
+"""
+import math
+import random
+import time
+from constants import *
+from ai_engine import (
+    SearchContext, available_moves, check_winner, is_mate_score, negamax, root_bonus, search_root
+)
+from game_record import iter_records, replay
+
+def random_positions(count, min_stones=6, max_stones=14, seed=0):
+    """Undecided random positions with the AI to move"""
+    rng = random.Random(seed)
+    positions = []
+    cells = [(r, c) for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)]
+    while len(positions) < count:
+        board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        rng.shuffle(cells)
+        # An odd stone count means X moved last, so the AI (O) is to move
+        stones = 2 * rng.randrange(min_stones // 2, max_stones // 2 + 1) + 1
+        for index, (r, c) in enumerate(cells[:stones]):
+            board[r][c] = PLAYER if index % 2 == 0 else AI
+        if not check_winner(board):
+            positions.append(board)
+    return positions
+
+def record_positions(path, count, min_stones=6):
+    """AI-to-move positions from recorded games"""
+    positions = []
+    for record in iter_records(path):
+        for ply, (board, mark, move) in enumerate(replay(record)):
+            if mark == AI and ply >= min_stones and not check_winner(board):
+                positions.append([row[:] for row in board])
+                if len(positions) == count:
+                    return positions
+    return positions
+
+def exact_move_score(board, move, depth):
+    """Full-width score of one root move, as search_root would see it"""
+    i, j = move
+    board[i][j] = AI
+    try:
+        score = -negamax(board, depth - 1, -math.inf, math.inf, PLAYER, 1, SearchContext())
+        if not is_mate_score(score):
+            score += root_bonus(board, move)
+    finally:
+        board[i][j] = None
+    return score
+
+def compare(positions, depth=4, pruned_depth=None, **pruning):
+    """Search every position with and without pruning; returns summary statistics"""
+    pruned_depth = pruned_depth or depth
+    totals = {
+        'positions': 0, 'same_move': 0, 'base_nodes': 0, 'pruned_nodes': 0,
+        'base_time': 0.0, 'pruned_time': 0.0, 'score_loss': 0.0, 'max_loss': 0.0,
+        'reductions': 0, 're_searches': 0, 'futility_prunes': 0,
+    }
+    for index, position in enumerate(positions):
+        if not available_moves(position):
+            continue
+        board = [row[:] for row in position]
+
+        random.seed(index)
+        base = SearchContext()
+        start = time.perf_counter()
+        base_move, base_score = search_root(board, depth, base)
+        totals['base_time'] += time.perf_counter() - start
+
+        random.seed(index)
+        pruned = SearchContext(**pruning)
+        start = time.perf_counter()
+        pruned_move, _ = search_root(board, pruned_depth, pruned)
+        totals['pruned_time'] += time.perf_counter() - start
+
+        loss = 0.0
+        if pruned_move != base_move:
+            loss = max(0.0, base_score - exact_move_score(board, pruned_move, depth))
+        else:
+            totals['same_move'] += 1
+        totals['positions'] += 1
+        totals['base_nodes'] += base.nodes
+        totals['pruned_nodes'] += pruned.nodes
+        totals['score_loss'] += loss
+        totals['max_loss'] = max(totals['max_loss'], loss)
+        for name in ('reductions', 're_searches', 'futility_prunes'):
+            totals[name] += getattr(pruned, name)
+    return totals
+
+def format_summary(totals, depth, pruned_depth):
+    count = max(totals['positions'], 1)
+    return '\n'.join([
+        f"Positions: {totals['positions']}",
+        f"Nodes: depth {depth} {totals['base_nodes'] / count:.0f}, "
+        f"pruned depth {pruned_depth} {totals['pruned_nodes'] / count:.0f} per search "
+        f"({totals['pruned_nodes'] / max(totals['base_nodes'], 1):.2f}x)",
+        f"Time: {1000 * totals['base_time'] / count:.1f} ms vs {1000 * totals['pruned_time'] / count:.1f} ms "
+        f"per search ({totals['pruned_time'] / max(totals['base_time'], 1e-9):.2f}x)",
+        f"Same move: {100 * totals['same_move'] / count:.1f}%",
+        f"Score loss at depth {depth}: mean {totals['score_loss'] / count:.1f}, max {totals['max_loss']:.1f}",
+        f"Reductions {totals['reductions']}, re-searches {totals['re_searches']}, "
+        f"futility prunes {totals['futility_prunes']}",
+    ])
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare pruned and full-width search")
+    parser.add_argument('--positions', type=int, default=20)
+    parser.add_argument('--records', help="Take positions from a game record file")
+    parser.add_argument('--depth', type=int, default=4, help="Baseline depth")
+    parser.add_argument('--pruned-depth', type=int, default=None, help="Depth for the pruned search")
+    parser.add_argument('--lmr-start', type=int, default=None)
+    parser.add_argument('--lmr-min-depth', type=int, default=3)
+    parser.add_argument('--lmr-reduction', type=int, default=1)
+    parser.add_argument('--futility-margin', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.records:
+        positions = record_positions(args.records, args.positions)
+    else:
+        positions = random_positions(args.positions, seed=args.seed)
+    totals = compare(positions, args.depth, args.pruned_depth,
+                     lmr_start=args.lmr_start, lmr_min_depth=args.lmr_min_depth,
+                     lmr_reduction=args.lmr_reduction, futility_margin=args.futility_margin)
+    print(format_summary(totals, args.depth, args.pruned_depth or args.depth))
@@ -0,0 +1,108 @@
+# selfplay.py
+"""Headless games against the engine, for records, training and soak runs"""
+import random
+import time
+from constants import *
+from ai_engine import best_move, check_winner, available_moves, ai_learning
+from difficulty import DEFAULT_LEVEL, get_profile
+from threat_search import win_squares
+from game_record import (
+    GameRecordWriter, GameRecorder, DEFAULT_RECORD_FILE,
+    RESULT_DRAW, RESULT_PLAYER_WIN, RESULT_AI_WIN, FLAG_HEADLESS, FLAG_LEARNING,
+    FLAG_STORE_UPDATED
+)
+
+# --- Policies: (board, mark) -> move ---
+def random_policy(board, mark):
+    moves = available_moves(board)
+    return random.choice(moves) if moves else None
+
+def greedy_policy(board, mark):
+    """Win if possible, block if needed, otherwise a random move near the center"""
+    wins = win_squares(board, mark)
+    if wins:
+        return wins[0]
+    blocks = win_squares(board, PLAYER if mark == AI else AI)
+    if blocks:
+        return blocks[0]
+    moves = available_moves(board)
+    if not moves:
+        return None
+    weights = [1 / (1 + abs(r - 2.5) + abs(c - 2.5)) for r, c in moves]
+    return random.choices(moves, weights)[0]
+
+def engine_policy(board, mark, profile=None):
+    """The real engine at a difficulty profile (None: full strength); it only plays the AI mark"""
+    return best_move(board, profile)
+
+def profile_policy(profile):
+    """engine_policy bound to one difficulty profile"""
+    return lambda board, mark: engine_policy(board, mark, profile)
+
+def play_game(x_policy=greedy_policy, o_policy=None, recorder=None, learn=False, profile=None):
+    """Play one game, X first; returns (result, moves).
+
+    Without `o_policy` the engine plays O at `profile` (default: the
+    default difficulty level).
+    """
+    if o_policy is None:
+        o_policy = profile_policy(profile or get_profile(DEFAULT_LEVEL))
+    board = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    moves = []
+    result = RESULT_DRAW
+    mark = PLAYER
+    while available_moves(board):
+        policy = x_policy if mark == PLAYER else o_policy
+        start = time.perf_counter()
+        move = policy(board, mark)
+        elapsed = time.perf_counter() - start
+        if move is None or board[move[0]][move[1]] is not None:
+            raise ValueError(f"Illegal move {move} by {mark}")
+        board[move[0]][move[1]] = mark
+        moves.append(move)
+        if recorder:
+            recorder.add_move(move, elapsed if mark == AI else None)
+        if check_winner(board):
+            result = RESULT_PLAYER_WIN if mark == PLAYER else RESULT_AI_WIN
+            break
+        mark = AI if mark == PLAYER else PLAYER
+
+    if learn:
+        # Same rule as the GUI: a tie counts as a success for the AI
+        ai_learning.learn_from_game(result != RESULT_PLAYER_WIN)
+    else:
+        # best_move records its tactical moves; drop them instead of learning
+        ai_learning.current_game_moves = []
+    if recorder:
+        recorder.finish(result, FLAG_STORE_UPDATED if learn else 0)
+    return result, moves
+
+def run_games(count, path=DEFAULT_RECORD_FILE, x_policy=greedy_policy, learn=False, profile=None):
+    """Play `count` games at `profile` and append them to the record file at `path`"""
+    profile = profile or get_profile(DEFAULT_LEVEL)
+    results = {RESULT_DRAW: 0, RESULT_PLAYER_WIN: 0, RESULT_AI_WIN: 0}
+    # Stamped like Board.apply_difficulty; learned moves are played whether
+    # or not this run adds to the store
+    flags = FLAG_HEADLESS | (FLAG_LEARNING if profile.use_learning else 0)
+    with GameRecordWriter(path) as writer:
+        recorder = GameRecorder(writer, depth=profile.max_depth, profile=profile.level, flags=flags)
+        for _ in range(count):
+            result, _ = play_game(x_policy, None, recorder, learn, profile)
+            results[result] += 1
+    return results
+
+POLICIES = {'random': random_policy, 'greedy': greedy_policy}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Play headless SmartTac games")
+    parser.add_argument('games', type=int, help="Number of games")
+    parser.add_argument('--out', default=DEFAULT_RECORD_FILE, help="Record file to append to")
+    parser.add_argument('--opponent', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--learn', action='store_true', help="Update ai_memory.json")
+    parser.add_argument('--level', type=int, default=DEFAULT_LEVEL, help="Engine difficulty level")
+    args = parser.parse_args()
+    results = run_games(args.games, args.out, POLICIES[args.opponent], args.learn,
+                        get_profile(args.level))
+    print(f"Player {results[RESULT_PLAYER_WIN]}, AI {results[RESULT_AI_WIN]}, "
+          f"draws {results[RESULT_DRAW]}")
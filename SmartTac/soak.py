@@ -0,0 +1,167 @@
+# soak.py
+"""Long headless runs that watch memory, latency and throughput over time.
+
+Games are played back to back against the engine.  Every `interval`
+seconds one JSON line is appended to the output: cache sizes, process
+memory, engine move latency percentiles and throughput for that interval.
+Tables past their caps and memory growth past the configured limits are
+flagged in the line and printed.
+"""
+import json
+import math
+import time
+import tracemalloc
+from ai_engine import ai_learning, best_move
+from difficulty import get_profile
+from memory_report import memory_report, over_caps, process_rss, take_snapshot, top_allocations
+from selfplay import play_game, POLICIES
+
+DEFAULT_SOAK_FILE = "soak_log.jsonl"
+DEFAULT_SOAK_MEMORY = "soak_memory.json"  # Keeps --learn runs away from ai_memory.json
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class SoakRun:
+    """Plays games and collects one telemetry sample per interval"""
+
+    def __init__(self, opponent='greedy', profile=None, learn=False, byte_caps=None,
+                 max_rss_growth=None, trace=False):
+        self.x_policy = POLICIES[opponent]
+        self.profile = profile
+        self.learn = learn
+        self.byte_caps = byte_caps or {}
+        self.max_rss_growth = max_rss_growth  # Bytes over the first sample's RSS
+        self.trace = trace
+        self.latencies = []  # Engine seconds per move in the current interval
+        self.games = 0
+        self.moves = 0
+        self.samples = 0
+        self.start_rss = None
+        self.first_snapshot = take_snapshot() if trace else None
+
+    def engine_policy(self, board, mark):
+        start = time.perf_counter()
+        move = best_move(board, self.profile)
+        self.latencies.append(time.perf_counter() - start)
+        return move
+
+    def play(self):
+        result, moves = play_game(self.x_policy, self.engine_policy, learn=self.learn)
+        self.games += 1
+        self.moves += len(moves)
+        return result
+
+    def sample(self, elapsed, interval_seconds, interval_games):
+        """Telemetry for the interval that just ended; resets the latency window"""
+        latencies = sorted(self.latencies)
+        self.latencies = []
+        stats = memory_report()
+        flags = over_caps(stats, self.byte_caps)
+
+        rss = process_rss()
+        if rss is not None:
+            if self.start_rss is None:
+                self.start_rss = rss
+            elif self.max_rss_growth is not None and rss - self.start_rss > self.max_rss_growth:
+                flags.append(f"rss grew {rss - self.start_rss} bytes, cap {self.max_rss_growth}")
+
+        record = {
+            'sample': self.samples,
+            'elapsed': round(elapsed, 1),
+            'games': self.games,
+            'moves': self.moves,
+            'games_per_min': round(60 * interval_games / interval_seconds, 2) if interval_seconds else None,
+            'engine_moves_per_sec': round(len(latencies) / interval_seconds, 2) if interval_seconds else None,
+            'latency_ms': {
+                name: None if value is None else round(1000 * value, 2)
+                for name, value in (('p50', percentile(latencies, 0.5)),
+                                    ('p90', percentile(latencies, 0.9)),
+                                    ('p99', percentile(latencies, 0.99)),
+                                    ('max', latencies[-1] if latencies else None))
+            },
+            'rss': rss,
+            'caches': {entry.name: [entry.entries, entry.bytes] for entry in stats},
+            'flags': flags,
+        }
+        if self.trace:
+            record['traced'] = tracemalloc.get_traced_memory()[0]
+            record['top_growth'] = top_allocations(take_snapshot(), self.first_snapshot, limit=5)
+        self.samples += 1
+        return record
+
+def run_soak(duration, interval=60.0, path=DEFAULT_SOAK_FILE, max_games=None, verbose=True, **options):
+    """Play for `duration` seconds (or `max_games` games); returns the samples taken.
+
+    `options` are passed to SoakRun.
+    """
+    run = SoakRun(**options)
+    samples = []
+    start = time.perf_counter()
+    last_time, last_games = start, 0
+    with open(path, 'a') as log:
+        while True:
+            now = time.perf_counter()
+            finished = now - start >= duration or (max_games is not None and run.games >= max_games)
+            # The first sample is the baseline that growth is measured against
+            if finished or run.samples == 0 or now - last_time >= interval:
+                seconds = now - last_time if run.samples else 0.0
+                record = run.sample(now - start, seconds, run.games - last_games)
+                log.write(json.dumps(record) + '\n')
+                log.flush()
+                samples.append(record)
+                last_time, last_games = now, run.games
+                if verbose:
+                    print(format_sample(record))
+                    for flag in record['flags']:
+                        print(f"  FLAG {flag}")
+            if finished:
+                break
+            run.play()
+    return samples
+
+def format_sample(record):
+    latency = record['latency_ms']
+    rss = f"{record['rss'] / 1048576:.1f} MB" if record['rss'] is not None else "n/a"
+    return (f"[{record['elapsed']:>8.0f}s] games {record['games']}, "
+            f"{record['games_per_min']} games/min, p50 {latency['p50']} ms, "
+            f"p99 {latency['p99']} ms, rss {rss}")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Soak-test the engine with headless games")
+    parser.add_argument('--hours', type=float, default=1.0, help="How long to run")
+    parser.add_argument('--games', type=int, default=None, help="Stop after this many games")
+    parser.add_argument('--interval', type=float, default=60.0, help="Seconds between samples")
+    parser.add_argument('--out', default=DEFAULT_SOAK_FILE, help="JSON lines file to append to")
+    parser.add_argument('--opponent', choices=sorted(POLICIES), default='greedy')
+    parser.add_argument('--level', type=int, default=None, help="Difficulty level (default: full strength)")
+    parser.add_argument('--learn', action='store_true', help="Update a learning store every game")
+    parser.add_argument('--memory-file', default=DEFAULT_SOAK_MEMORY,
+                        help="Learning store used with --learn")
+    parser.add_argument('--cap', action='append', default=[], metavar='NAME=BYTES',
+                        help="Byte cap for one cache, e.g. search.tt=50000000")
+    parser.add_argument('--max-rss-growth', type=float, default=None, help="Flag RSS growth past this many MB")
+    parser.add_argument('--trace', action='store_true', help="Record tracemalloc growth per sample")
+    args = parser.parse_args()
+
+    byte_caps = {}
+    for cap in args.cap:
+        name, _, size = cap.partition('=')
+        byte_caps[name] = int(size)
+    if args.learn:
+        ai_learning.memory_file = args.memory_file
+        ai_learning.board_states = ai_learning.load_memory()
+        ai_learning.move_cache.clear()
+    samples = run_soak(
+        args.hours * 3600, args.interval, args.out, args.games,
+        opponent=args.opponent, learn=args.learn, byte_caps=byte_caps, trace=args.trace,
+        profile=None if args.level is None else get_profile(args.level),
+        max_rss_growth=None if args.max_rss_growth is None else args.max_rss_growth * 1048576,
+    )
+    flagged = sum(1 for record in samples if record['flags'])
+    print(f"{len(samples)} samples, {flagged} flagged; log in {args.out}")
@@ -0,0 +1,242 @@
+# threat_search.py
+"""Threat-space search: forced wins built only from forcing moves.
+
+A "four" is a move that leaves the attacker one stone short of a line of
+four with the last cell empty, so the defender's reply is forced.  Searching
+only those moves (VCF, victory by continuous fours) reaches far deeper than
+the full-width minimax at a fraction of the cost.  VCT additionally allows
+"three" moves, which threaten to make a double four on the next turn.
+"""
+from constants import *
+from ai_learning import board_key, opponent_of
+
+WIN_LENGTH = 4
+
+# --- Line windows ---
+def _build_windows():
+    """All runs of WIN_LENGTH cells in every direction"""
+    windows = []
+    for dr, dc in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        for row in range(BOARD_SIZE):
+            for col in range(BOARD_SIZE):
+                end_r = row + dr * (WIN_LENGTH - 1)
+                end_c = col + dc * (WIN_LENGTH - 1)
+                if 0 <= end_r < BOARD_SIZE and 0 <= end_c < BOARD_SIZE:
+                    windows.append(tuple((row + dr * k, col + dc * k) for k in range(WIN_LENGTH)))
+    return windows
+
+WINDOWS = _build_windows()
+
+# Windows through each cell, so a move only has to re-check its own lines
+CELL_WINDOWS = {(r, c): [w for w in WINDOWS if (r, c) in w]
+                for r in range(BOARD_SIZE) for c in range(BOARD_SIZE)}
+
+def win_squares(board, mark):
+    """Empty cells where `mark` would complete a line of four"""
+    squares = []
+    for window in WINDOWS:
+        own = 0
+        empty = None
+        for r, c in window:
+            cell = board[r][c]
+            if cell == mark:
+                own += 1
+            elif cell is None:
+                if empty is not None:
+                    break
+                empty = (r, c)
+            else:
+                break
+        else:
+            if own == WIN_LENGTH - 1 and empty not in squares:
+                squares.append(empty)
+    return squares
+
+def _window_candidates(board, mark, own_needed):
+    """Empty cells in windows holding `own_needed` stones of `mark` and no opponent stones"""
+    scores = {}
+    for window in WINDOWS:
+        own = 0
+        empties = []
+        for r, c in window:
+            cell = board[r][c]
+            if cell == mark:
+                own += 1
+            elif cell is None:
+                empties.append((r, c))
+            else:
+                break
+        else:
+            if own == own_needed:
+                for cell in empties:
+                    scores[cell] = scores.get(cell, 0) + 1
+    # Cells that sit in several windows create the most threats
+    return sorted(scores, key=lambda cell: -scores[cell])
+
+def four_moves(board, mark):
+    """Moves that create at least one win square for `mark`"""
+    return _window_candidates(board, mark, WIN_LENGTH - 2)
+
+def three_moves(board, mark):
+    """Moves that bring a window to two stones, threatening a four next turn"""
+    return _window_candidates(board, mark, WIN_LENGTH - 3)
+
+def has_line(board, move):
+    """Check whether the stone on `move` completes a line of four"""
+    mark = board[move[0]][move[1]]
+    return any(all(board[r][c] == mark for r, c in window) for window in CELL_WINDOWS[move])
+
+# --- Search ---
+class ThreatSearch:
+    """VCF/VCT search with a node budget and a failure memo.
+
+    The memo is keyed by board string and attacker, and only stores
+    refuted positions, so it stays valid across calls on the same game.
+    """
+
+    def __init__(self, max_depth=12, max_nodes=5000, use_threes=True, three_depth=2,
+                 max_memo=50000):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_memo = max_memo
+        self.use_threes = use_threes
+        self.three_depth = three_depth
+        self.nodes = 0
+        self.failed = {}
+
+    def _key(self, board, attacker):
+        return board_key(board) + attacker
+
+    def vcf(self, board, attacker, depth=None):
+        """Return a forced winning line for `attacker` (to move) using fours only"""
+        self.nodes = 0
+        return self._vcf(board, attacker, self.max_depth if depth is None else depth)
+
+    def _vcf(self, board, attacker, depth):
+        defender = opponent_of(attacker)
+        wins = win_squares(board, attacker)
+        if wins:
+            return [wins[0]]
+        if depth <= 0 or self.nodes >= self.max_nodes:
+            return None
+
+        key = self._key(board, attacker)
+        if self.failed.get(key, -1) >= depth:
+            return None
+        self.nodes += 1
+
+        # If the defender already has a four, the only legal try is to block it
+        threats = win_squares(board, defender)
+        if len(threats) > 1:
+            return None
+        candidates = threats if threats else four_moves(board, attacker)
+
+        for move in candidates:
+            board[move[0]][move[1]] = attacker
+            replies = win_squares(board, attacker)
+            line = None
+            if len(replies) > 1:
+                # Double four: the defender can only block one
+                line = [move, replies[0], replies[1]]
+            elif replies:
+                reply = replies[0]
+                board[reply[0]][reply[1]] = defender
+                if not has_line(board, reply):
+                    rest = self._vcf(board, attacker, depth - 1)
+                    if rest:
+                        line = [move, reply] + rest
+                board[reply[0]][reply[1]] = None
+            board[move[0]][move[1]] = None
+            if line:
+                return line
+
+        if self.nodes < self.max_nodes:
+            if len(self.failed) >= self.max_memo:
+                self.failed.clear()
+            self.failed[key] = depth
+        return None
+
+    def vct(self, board, attacker, depth=None):
+        """Return a forced winning line for `attacker` using fours and threes"""
+        self.nodes = 0
+        if not self.use_threes:
+            return self._vcf(board, attacker, self.max_depth)
+        return self._vct(board, attacker, self.three_depth if depth is None else depth)
+
+    def _vct(self, board, attacker, depth):
+        line = self._vcf(board, attacker, self.max_depth)
+        if line:
+            return line
+        if depth <= 0 or self.nodes >= self.max_nodes:
+            return None
+
+        defender = opponent_of(attacker)
+        # A defender four has to be answered first, which is a VCF matter
+        if win_squares(board, defender):
+            return None
+
+        for move in three_moves(board, attacker):
+            board[move[0]][move[1]] = attacker
+            # The three is only a threat if a pass would lose to VCF
+            threat_line = self._vcf(board, attacker, self.max_depth)
+            proven = False
+            if threat_line:
+                proven = True
+                for reply in self._defenses(board, defender, threat_line):
+                    board[reply[0]][reply[1]] = defender
+                    refuted = has_line(board, reply) or not self._vct(board, attacker, depth - 1)
+                    board[reply[0]][reply[1]] = None
+                    if refuted:
+                        proven = False
+                        break
+            board[move[0]][move[1]] = None
+            if proven:
+                return [move] + threat_line
+        return None
+
+    def _defenses(self, board, defender, threat_line):
+        """Replies worth trying against a threat: its cells and the defender's own fours"""
+        replies = []
+        for move in list(threat_line) + four_moves(board, defender):
+            if board[move[0]][move[1]] is None and move not in replies:
+                replies.append(move)
+        return replies
+
+    def defensive_move(self, board, defender):
+        """Find a move for `defender` that stops the opponent's forced win.
+
+        Returns None when the opponent has no forced win.  When every
+        candidate fails, the first cell of the opponent's line is returned
+        so that at least the main threat is blocked.
+        """
+        attacker = opponent_of(defender)
+        self.nodes = 0
+        immediate = win_squares(board, attacker)
+        if immediate:
+            return immediate[0]
+        line = self._vcf(board, attacker, self.max_depth)
+        if not line:
+            return None
+
+        for move in self._defenses(board, defender, line):
+            board[move[0]][move[1]] = defender
+            self.nodes = 0
+            refuted = has_line(board, move) or not self._vcf(board, attacker, self.max_depth)
+            board[move[0]][move[1]] = None
+            if refuted:
+                return move
+        return line[0]
+
+# Shared instance so the failure memo carries over between moves
+threat_searcher = ThreatSearch()
+
+def find_forced_win(board, mark=AI):
+    """Forced winning line for `mark` to move, or None"""
+    return threat_searcher.vct(board, mark)
+
+def find_forced_defense(board, mark=AI):
+    """Move `mark` must play to stop a forced win, or None"""
+    return threat_searcher.defensive_move(board, mark)
+
+def clear_threat_cache():
+    threat_searcher.failed.clear()
@@ -0,0 +1,61 @@
+# trainer.py
+"""Offline trainer: rebuild the learned move table from game records.
+
+Record files are split into chunks, each chunk is replayed into its own
+LearningShard in a worker process (map), and the shards are merged into a
+single compacted ai_memory.json-style store (reduce).
+"""
+from multiprocessing import Pool
+from constants import *
+from ai_learning import LearningShard, board_key
+from game_record import (
+    iter_records, replay, scan_chunks, RESULT_PLAYER_WIN, RESULT_UNFINISHED
+)
+
+def train_chunk(chunk):
+    """Map step: replay one (path, offset, count) chunk into a shard"""
+    path, offset, count = chunk
+    shard = LearningShard()
+    for record in iter_records(path, offset, count):
+        if record.result == RESULT_UNFINISHED:
+            continue
+        # Same rule as the GUI: a tie counts as a success for the AI
+        won = record.result != RESULT_PLAYER_WIN
+        for board, mark, move in replay(record):
+            if mark == AI:
+                shard.add(board_key(board), move, won)
+    return shard
+
+def train(record_paths, base_paths=(), workers=None, chunk_size=5000):
+    """Replay records across a process pool and merge everything into one shard"""
+    chunks = [chunk for path in record_paths for chunk in scan_chunks(path, chunk_size)]
+    merged = LearningShard()
+    for path in base_paths:
+        merged.merge(LearningShard.load(path))
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            merged.merge(train_chunk(chunk))
+        return merged
+    with Pool(workers) as pool:
+        for shard in pool.imap_unordered(train_chunk, chunks):
+            merged.merge(shard)
+    return merged
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the learned move table from game records")
+    parser.add_argument('records', nargs='*', help="Game record files to replay")
+    parser.add_argument('--base', nargs='*', default=[],
+                        help="Existing stores or shards to merge in (e.g. ai_memory.json)")
+    parser.add_argument('--out', default="ai_memory.json",
+                        help="Compacted store to write")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="Games per chunk")
+    parser.add_argument('--min-plays', type=int, default=1, help="Drop moves played fewer times")
+    parser.add_argument('--max-positions', type=int, default=None, help="Positions to keep")
+    args = parser.parse_args()
+
+    shard = train(args.records, args.base, args.workers, args.chunk_size)
+    shard.compact(args.min_plays, args.max_positions)
+    shard.save(args.out)
+    print(f"Wrote {len(shard)} positions to {args.out}")
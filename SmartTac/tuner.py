@@ -0,0 +1,199 @@
+# tuner.py
+"""Texel-style tuning of the evaluate() weights from game outcomes.
+
+Every position of the recorded (or freshly self-played) games becomes one
+row of feature counts.  evaluate() is linear in the line and position
+weights and multilinear in the pos_/dir_ multipliers, so the scores of the
+whole dataset are one matrix product, and so is the gradient.  The weights are
+fitted in log space (they stay positive) by minimizing the squared error
+between sigmoid(K * score) and the game result.  Requires numpy.
+"""
+import numpy as np
+from constants import *
+from ai_engine import (
+    DEFAULT_EVAL_WEIGHTS, WEIGHT_NAMES, EVAL_WEIGHTS_FILE, LINE_KINDS,
+    POSITION_CLASSES, DIRECTION_CLASSES, LINEAR_FEATURES,
+    check_winner, eval_weights, evaluation_features, feature_sign, save_eval_weights
+)
+from game_record import (
+    GameRecord, iter_records, replay,
+    RESULT_AI_WIN, RESULT_DRAW, RESULT_PLAYER_WIN
+)
+
+# Fours only occur in finished games, which are not in the dataset, so
+# their weights carry no signal; keeping them fixed also anchors the scale
+FROZEN_WEIGHTS = {'ai_four', 'player_four'}
+
+OUTCOMES = {RESULT_AI_WIN: 1.0, RESULT_DRAW: 0.5, RESULT_PLAYER_WIN: 0.0}
+
+KIND_INDEX = {kind: i for i, kind in enumerate(LINE_KINDS)}
+POSITION_INDEX = {name: i for i, name in enumerate(POSITION_CLASSES)}
+DIRECTION_INDEX = {name: i for i, name in enumerate(DIRECTION_CLASSES)}
+LINEAR_INDEX = {name: i for i, name in enumerate(LINEAR_FEATURES)}
+
+class Dataset:
+    """Feature counts and outcomes of N positions"""
+
+    def __init__(self, line_counts, linear_counts, outcomes):
+        self.line_counts = line_counts  # (N, kinds, position classes, direction classes)
+        self.linear_counts = linear_counts  # (N, linear features)
+        self.outcomes = outcomes  # (N,) 1 AI win, 0.5 draw, 0 player win
+
+    def __len__(self):
+        return len(self.outcomes)
+
+def positions_from_records(records):
+    """Yield (board, outcome) for every undecided position of finished games"""
+    for record in records:
+        outcome = OUTCOMES.get(record.result)
+        if outcome is None:
+            continue
+        for ply, (board, mark, move) in enumerate(replay(record)):
+            if ply > 0 and not check_winner(board):
+                yield board, outcome
+
+def build_dataset(positions):
+    """Extract features from (board, outcome) pairs into dense arrays"""
+    line_rows, linear_rows, outcomes = [], [], []
+    shape = (len(LINE_KINDS), len(POSITION_CLASSES), len(DIRECTION_CLASSES))
+    for board, outcome in positions:
+        line = np.zeros(shape, dtype=np.float32)
+        linear = np.zeros(len(LINEAR_FEATURES), dtype=np.float32)
+        for key, count in evaluation_features(board).items():
+            if isinstance(key, tuple):
+                kind, pos_class, dir_class = key
+                line[KIND_INDEX[kind], POSITION_INDEX[pos_class], DIRECTION_INDEX[dir_class]] += count
+            else:
+                linear[LINEAR_INDEX[key]] += count
+        line_rows.append(line)
+        linear_rows.append(linear)
+        outcomes.append(outcome)
+    if not outcomes:
+        raise ValueError("No positions to tune on")
+    return Dataset(np.stack(line_rows), np.stack(linear_rows), np.array(outcomes))
+
+def _weight_arrays(weights):
+    kinds = np.array([feature_sign(kind) * weights[kind] for kind in LINE_KINDS])
+    positions = np.array([weights[name] if name else 1.0 for name in POSITION_CLASSES])
+    directions = np.array([weights[name] if name else 1.0 for name in DIRECTION_CLASSES])
+    linear = np.array([feature_sign(name) * weights[name] for name in LINEAR_FEATURES])
+    return kinds, positions, directions, linear
+
+def dataset_scores(data, weights):
+    """evaluate() for every position at once"""
+    kinds, positions, directions, linear = _weight_arrays(weights)
+    line_weights = np.einsum('k,p,d->kpd', kinds, positions, directions).ravel()
+    flat = data.line_counts.reshape(len(data), -1)
+    return flat @ line_weights + data.linear_counts @ linear
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-np.clip(x, -50, 50)))
+
+def loss(data, weights, k):
+    return float(np.mean((_sigmoid(k * dataset_scores(data, weights)) - data.outcomes) ** 2))
+
+def gradient(data, weights, k):
+    """d loss / d weight for every name in WEIGHT_NAMES"""
+    kinds, positions, directions, linear = _weight_arrays(weights)
+    scores = dataset_scores(data, weights)
+    predicted = _sigmoid(k * scores)
+    # d loss / d score for every position
+    residual = 2 * (predicted - data.outcomes) * predicted * (1 - predicted) * k / len(data)
+
+    grad = {}
+    # One pass over the data; the rest only touches the small weight tensors
+    totals = (residual @ data.line_counts.reshape(len(data), -1)).reshape(data.line_counts.shape[1:])
+    by_kind = np.einsum('kpd,p,d->k', totals, positions, directions)
+    for i, kind in enumerate(LINE_KINDS):
+        grad[kind] = feature_sign(kind) * by_kind[i]
+    by_position = np.einsum('kpd,k,d->p', totals, kinds, directions)
+    for i, name in enumerate(POSITION_CLASSES):
+        if name:
+            grad[name] = by_position[i]
+    by_direction = np.einsum('kpd,k,p->d', totals, kinds, positions)
+    for i, name in enumerate(DIRECTION_CLASSES):
+        if name:
+            grad[name] = by_direction[i]
+    by_linear = residual @ data.linear_counts
+    for i, name in enumerate(LINEAR_FEATURES):
+        grad[name] = feature_sign(name) * by_linear[i]
+    return grad
+
+def fit_scale(data, weights):
+    """Texel's K: the sigmoid scale that best fits the current weights"""
+    candidates = np.logspace(-5, -1, 41)
+    best = min(candidates, key=lambda k: loss(data, weights, k))
+    # Refine around the best grid point
+    low, high = best / 1.26, best * 1.26
+    for _ in range(30):
+        a, b = low + (high - low) / 3, high - (high - low) / 3
+        if loss(data, weights, a) < loss(data, weights, b):
+            high = b
+        else:
+            low = a
+    return (low + high) / 2
+
+def tune(data, weights=None, iterations=300, learning_rate=0.05, regularization=1e-4,
+         frozen=FROZEN_WEIGHTS, verbose=False):
+    """Fit the weights with Adam in log space; returns (weights, K, loss before, loss after)"""
+    start = dict(weights or eval_weights)
+    k = fit_scale(data, start)
+    names = [name for name in WEIGHT_NAMES if name not in frozen and start[name] > 0]
+    theta0 = np.log(np.array([start[name] for name in names], dtype=float))
+    theta = theta0.copy()
+    m = np.zeros_like(theta)
+    v = np.zeros_like(theta)
+    before = loss(data, start, k)
+
+    current = dict(start)
+    for step in range(1, iterations + 1):
+        current.update(zip(names, np.exp(theta)))
+        grad = gradient(data, current, k)
+        # Chain rule for w = exp(theta), plus a pull back towards the start
+        g = np.array([grad[name] * current[name] for name in names])
+        g += regularization * (theta - theta0)
+        m = 0.9 * m + 0.1 * g
+        v = 0.999 * v + 0.001 * g * g
+        m_hat = m / (1 - 0.9 ** step)
+        v_hat = v / (1 - 0.999 ** step)
+        theta -= learning_rate * m_hat / (np.sqrt(v_hat) + 1e-12)
+        if verbose and step % 50 == 0:
+            current.update(zip(names, np.exp(theta)))
+            print(f"step {step}: loss {loss(data, current, k):.6f}")
+
+    current.update(zip(names, np.exp(theta)))
+    return current, k, before, loss(data, current, k)
+
+def selfplay_records(count, opponent='greedy'):
+    """Play fresh games against the engine and return them as records"""
+    from selfplay import play_game, POLICIES
+    from difficulty import DEFAULT_LEVEL, get_profile
+    profile = get_profile(DEFAULT_LEVEL)
+    records = []
+    for _ in range(count):
+        result, moves = play_game(POLICIES[opponent], profile=profile)
+        records.append(GameRecord(result, moves, profile.max_depth, profile.level, 0, 0, 0, 0))
+    return records
+
+if __name__ == "__main__":
+    import argparse
+    import itertools
+    parser = argparse.ArgumentParser(description="Tune evaluate() weights from game outcomes")
+    parser.add_argument('records', nargs='*', help="Game record files")
+    parser.add_argument('--selfplay', type=int, default=0, help="Extra games to self-play first")
+    parser.add_argument('--opponent', default='greedy', help="Self-play opponent policy")
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--learning-rate', type=float, default=0.05)
+    parser.add_argument('--from-defaults', action='store_true',
+                        help="Start from the built-in weights instead of the loaded ones")
+    parser.add_argument('--out', default=EVAL_WEIGHTS_FILE, help="Weight file to write")
+    args = parser.parse_args()
+
+    sources = [iter_records(path) for path in args.records]
+    if args.selfplay:
+        sources.append(selfplay_records(args.selfplay, args.opponent))
+    data = build_dataset(positions_from_records(itertools.chain(*sources)))
+    start = DEFAULT_EVAL_WEIGHTS if args.from_defaults else eval_weights
+    weights, k, before, after = tune(data, start, args.iterations, args.learning_rate, verbose=True)
+    save_eval_weights(weights, args.out)
+    print(f"{len(data)} positions, K={k:.6f}, loss {before:.6f} -> {after:.6f}; wrote {args.out}")